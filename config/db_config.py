@@ -1,11 +1,31 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from config.settings import settings
+import orjson
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from config.settings import get_settings
 
+settings = get_settings()
 DATABASE_URL = f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, echo=False)
+# One process-wide connection pool shared by the pipeline, tests and scripts
+POOL_SIZE = 10
+MAX_OVERFLOW = 20
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    echo=False,
+    insertmanyvalues_page_size=1000,  # rows per multi-VALUES INSERT batch
+    executemany_mode="values_plus_batch",  # psycopg2 execute_values/execute_batch fast paths
+    executemany_batch_page_size=500,
+    json_deserializer=orjson.loads,  # JSONB columns are decoded with orjson
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Thread-local sessions for the concurrent pipeline: each worker thread gets
+# its own Session (and pooled connection); call ScopedSession.remove() when done
+ScopedSession = scoped_session(SessionLocal)
 Base = declarative_base()
 
 
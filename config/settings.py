@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
+from functools import lru_cache
 
 class Settings(BaseSettings):
     # Database
@@ -22,13 +23,26 @@ class Settings(BaseSettings):
     USER_AGENT: str
     SCRAPE_DELAY: int = 2
     MAX_RETRIES: int = 3
+    SCRAPE_CACHE_DIR: str = ".cache/scrape"
+    PAGE_CACHE_TTL: int = 86400  # seconds a fetched page is reused
     
     # Processing
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
+    LANGID_MODEL_PATH: Optional[str] = "models/lid.176.ftz"  # fastText model; langdetect if absent
+    
+    # Embeddings (Gemini API quota)
+    EMBED_REQUESTS_PER_MINUTE: int = 60
+    EMBED_MAX_CONCURRENCY: int = 5
+    EMBED_CACHE_DIR: str = ".cache/embeddings"
+    EMBED_DTYPE: str = "float32"  # float32, float16 or int8 for stored vectors
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    """Load settings from the environment / .env once and reuse them.
+    Call get_settings.cache_clear() to reload (e.g. in tests)."""
+    return Settings()
\ No newline at end of file
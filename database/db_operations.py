@@ -1,67 +1,190 @@
 from typing import List, Dict, Optional
+from sqlalchemy import insert, select, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from database.models import Source, Chunk, ScrapingLog
 from loguru import logger
 from datetime import datetime
+import csv
+import io
+import json
 import uuid
 
+# Source columns filled from scraped dicts (id / ingested_at use model defaults)
+_SOURCE_FIELDS = [
+    c.name for c in Source.__table__.columns if c.name not in ('id', 'ingested_at')
+]
+_CHUNK_COLS = frozenset(c.name for c in Chunk.__table__.columns)
+
+# Batches larger than this are streamed with COPY instead of INSERT
+COPY_THRESHOLD = 1000
+# id / created_at are left to their server defaults
+_CHUNK_COPY_COLS = [
+    c.name for c in Chunk.__table__.columns if c.name not in ('id', 'created_at')
+]
+_CHUNK_JSONB_COLS = frozenset(('entities', 'tags', 'sentiment', 'leadership_polarity'))
+# NULL marker for the COPY loaders (an unquoted empty CSV field would also read as NULL)
+_COPY_NULL = '\\N'
+
+
+def psql_insert_copy(table, conn, keys, data_iter):
+    """
+    pandas to_sql `method` that loads each chunk with COPY FROM STDIN (CSV)
+    instead of parameterized INSERTs. None/NaN (passed as None by pandas) are
+    written as an explicit \\N marker so empty strings stay empty strings,
+    as they would with to_sql's INSERTs.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in data_iter:
+        writer.writerow([_COPY_NULL if value is None else value for value in row])
+    buf.seek(0)
+    
+    columns = ', '.join(f'"{k}"' for k in keys)
+    table_name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT CSV, NULL '{_COPY_NULL}')",
+            buf
+        )
+
+
 class DatabaseOperations:
+    """
+    Database helpers for the scraping pipeline.
+    Write methods only flush; callers own the transaction and finish it
+    with commit() / rollback() so a whole source is persisted atomically.
+    """
+    
     def __init__(self, db: Session):
         self.db = db
     
-    def save_source(self, source_data: Dict) -> Optional[uuid.UUID]:
-        """Save source to database"""
+    def commit(self) -> None:
+        """Commit the current transaction"""
+        self.db.commit()
+    
+    def rollback(self) -> None:
+        """Roll back the current transaction"""
+        self.db.rollback()
+    
+    def save_source(self, source_data: Dict) -> uuid.UUID:
+        """
+        Save source to database (or return the id of the stored one).
+        A single INSERT ... ON CONFLICT DO UPDATE ... RETURNING id replaces
+        the existence SELECT + INSERT + refresh round-trips.
+        Errors are logged and re-raised; the caller rolls back.
+        """
         try:
-            # Check if source already exists
-            existing = self.db.query(Source).filter(
-                Source.source_url == source_data['source_url']
-            ).first()
+            insert_stmt = pg_insert(Source).values(**self._source_row(source_data))
+            stmt = insert_stmt.on_conflict_do_update(
+                index_elements=['source_url'],
+                # no-op update so RETURNING also yields the existing row's id
+                set_={'source_url': insert_stmt.excluded.source_url}
+            ).returning(Source.id, literal_column("xmax = 0").label("inserted"))
+            source_id, inserted = self.db.execute(stmt).one()
             
-            if existing:
+            if not inserted:
                 logger.debug(f"Source already exists: {source_data['source_url']}")
-                return existing.id
-            
-            # Remove fields that aren't in the Source model
-            source_data_copy = source_data.copy()
-            source_data_copy.pop('raw_content', None)  # Remove raw_content
+                return source_id
             
-            source = Source(**source_data_copy)
-            self.db.add(source)
-            self.db.commit()
-            self.db.refresh(source)
-            
-            logger.info(f"✅ Saved source: {source.title[:50]}... (ID: {source.id})")
-            return source.id
+            logger.info(f"✅ Saved source: {(source_data.get('title') or '')[:50]}... (ID: {source_id})")
+            return source_id
         
         except Exception as e:
-            self.db.rollback()
             logger.error(f"Error saving source: {e}")
-            return None
+            raise
+    
+    def filter_new_sources(self, sources: List[Dict]) -> List[Dict]:
+        """
+        Drop sources whose URL is already stored, using one IN query for the
+        whole batch, plus duplicates within the batch. The remaining sources are
+        saved one by one with save_source(), inside the transaction that also
+        saves their chunks.
+        """
+        if not sources:
+            return []
+        
+        urls = {s['source_url'] for s in sources}
+        existing = set(self.db.execute(
+            select(Source.source_url).where(Source.source_url.in_(urls))
+        ).scalars())
+        
+        new_sources = []
+        for source_data in sources:
+            url = source_data['source_url']
+            if url in existing:
+                continue
+            existing.add(url)  # drop duplicates within the batch
+            new_sources.append(source_data)
+        
+        logger.info(f"Found {len(new_sources)} new sources ({len(sources) - len(new_sources)} already stored)")
+        return new_sources
+    
+    def _source_row(self, source_data: Dict) -> Dict:
+        """Map a scraped source dict onto Source columns"""
+        row = {field: source_data.get(field) for field in _SOURCE_FIELDS}
+        # Scrapers attach extra details under "metadata"
+        if row['extra_metadata'] is None:
+            row['extra_metadata'] = source_data.get('metadata')
+        if source_data.get('content_hash'):
+            row['extra_metadata'] = {**(row['extra_metadata'] or {}),
+                                     'content_hash': source_data['content_hash']}
+        return row
     
     def save_chunks(self, chunks: List[Dict]) -> int:
-        """Save multiple chunks to database"""
-        saved_count = 0
+        """Save multiple chunks to database in a single bulk INSERT"""
+        if not chunks:
+            return 0
+        
+        if len(chunks) > COPY_THRESHOLD:
+            return self.save_chunks_copy(chunks)
         
         try:
-            for chunk_data in chunks:
-                # Remove fields not in Chunk model
-                chunk_copy = chunk_data.copy()
-                chunk_copy.pop('embedding_vector', None)
-                chunk_copy.pop('embedding_dimension', None)
-                chunk_copy.pop('embedding_model', None)
-                
-                chunk = Chunk(**chunk_copy)
-                self.db.add(chunk)
-                saved_count += 1
+            # Keep only Chunk columns (drops embedding_* and other pipeline fields)
+            rows = [{k: v for k, v in c.items() if k in _CHUNK_COLS} for c in chunks]
             
-            self.db.commit()
-            logger.info(f"✅ Saved {saved_count} chunks")
-            return saved_count
+            # Core executemany -> batched multi-VALUES INSERT (insertmanyvalues)
+            self.db.execute(insert(Chunk), rows)
+            logger.info(f"✅ Saved {len(rows)} chunks")
+            return len(rows)
         
         except Exception as e:
-            self.db.rollback()
             logger.error(f"Error saving chunks: {e}")
-            return 0
+            raise
+    
+    def save_chunks_copy(self, chunks: List[Dict]) -> int:
+        """
+        Stream chunks with COPY FROM STDIN (CSV) for large batches.
+        Runs on the session's connection, so it shares the open transaction.
+        """
+        try:
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for chunk_data in chunks:
+                row = []
+                for col in _CHUNK_COPY_COLS:
+                    value = chunk_data.get(col)
+                    if value is None:
+                        value = _COPY_NULL
+                    elif col in _CHUNK_JSONB_COLS:
+                        value = json.dumps(value, ensure_ascii=False)
+                    row.append(value)
+                writer.writerow(row)
+            buf.seek(0)
+            
+            raw = self.db.connection().connection
+            with raw.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY chunks ({', '.join(_CHUNK_COPY_COLS)}) FROM STDIN WITH (FORMAT CSV, NULL '{_COPY_NULL}')",
+                    buf
+                )
+            
+            logger.info(f"✅ Saved {len(chunks)} chunks via COPY")
+            return len(chunks)
+        
+        except Exception as e:
+            logger.error(f"Error copying chunks: {e}")
+            raise
     
     def log_scraping(self, url: str, scraper_type: str, status: str, 
                      items_scraped: int = 0, error_message: str = None) -> None:
@@ -75,19 +198,58 @@ class DatabaseOperations:
                 error_message=error_message
             )
             self.db.add(log)
-            self.db.commit()
+            self.db.flush()
         except Exception as e:
-            self.db.rollback()
             logger.error(f"Error logging scraping: {e}")
+            raise
     
-    def get_sources_by_type(self, source_type: str, limit: int = 100) -> List[Source]:
-        """Get sources by type"""
+    def get_sources_by_type(self, source_type: str, limit: int = 100,
+                            columns: Optional[List] = None) -> List:
+        """
+        Get sources by type.
+        Pass columns (e.g. [Source.id, Source.title]) to fetch only those
+        fields as rows instead of full Source objects, skipping heavy
+        TEXT/JSONB columns.
+        """
+        if columns:
+            return self.db.execute(
+                select(*columns).where(Source.source_type == source_type).limit(limit)
+            ).all()
+        
         return self.db.query(Source).filter(
             Source.source_type == source_type
         ).limit(limit).all()
     
-    def get_chunks_by_source(self, source_id: uuid.UUID) -> List[Chunk]:
-        """Get all chunks for a source"""
+    def get_chunks_by_source(self, source_id: uuid.UUID,
+                             columns: Optional[List] = None) -> List:
+        """Get all chunks for a source (optionally only the given columns)"""
+        if columns:
+            return self.db.execute(
+                select(*columns).where(Chunk.source_id == source_id)
+            ).all()
+        
         return self.db.query(Chunk).filter(
             Chunk.source_id == source_id
-        ).all()
\ No newline at end of file
+        ).all()
+    
+    def get_chunk_texts_by_source(self, source_id: uuid.UUID) -> List:
+        """Get (id, seq, text) rows for a source's chunks, in order"""
+        return self.db.execute(
+            select(Chunk.id, Chunk.seq, Chunk.text)
+            .where(Chunk.source_id == source_id)
+            .order_by(Chunk.seq)
+        ).all()
+    
+    def find_chunks_by_tag(self, tag_key: str, tag_value, limit: int = 100) -> List[Chunk]:
+        """
+        Find chunks whose tags contain {tag_key: tag_value}.
+        
+        Renders as `tags @> '{...}'::jsonb`, which the jsonb_path_ops GIN
+        index on chunks.tags serves. Filter JSONB columns with .contains()
+        rather than ->> comparisons (or .has_key(), which that opclass does
+        not index) to stay on the index path. For list-valued tags such as
+        issues, pass a list: find_chunks_by_tag('issues', ['water_supply']).
+        """
+        return self.db.execute(
+            select(Chunk).where(Chunk.tags.contains({tag_key: tag_value})).limit(limit)
+        ).scalars().all()
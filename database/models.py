@@ -7,31 +7,35 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     Index,
+    text,
+    func,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from datetime import datetime
-import uuid
 from config.db_config import Base
 
+# Defaults are computed by PostgreSQL (gen_random_uuid() needs PG13+), so bulk
+# INSERT / COPY paths never round-trip per-row Python defaults.
+UUID_DEFAULT = func.gen_random_uuid()
+UTC_NOW = func.timezone("utc", func.now())
+
 
 class Source(Base):
     __tablename__ = "sources"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=UUID_DEFAULT)
     source_url = Column(Text, nullable=False, unique=True)
     title = Column(Text)
     domain = Column(String(255))
     source_type = Column(String(50))  # govt, media, research, etc.
     layer = Column(Integer)
     published_at = Column(DateTime)
-    ingested_at = Column(DateTime, default=datetime.utcnow)
+    ingested_at = Column(DateTime, server_default=UTC_NOW)
     language = Column(String(10))
     geo = Column(JSONB)
     trust_score = Column(Float)
     parser_version = Column(String(50))
     raw_blob_url = Column(Text)
-    raw_html = Column(Text)
     extra_metadata = Column(JSONB)
 
     # Relationships
@@ -46,14 +50,26 @@ class Source(Base):
         Index("idx_source_type", "source_type"),
         Index("idx_source_domain", "domain"),
         Index("idx_source_published", "published_at"),
-        Index("idx_source_geo", "geo", postgresql_using="gin"),
+        Index("idx_source_type_pub", "source_type", text("published_at DESC")),
+        Index(
+            "idx_source_geo",
+            "geo",
+            postgresql_using="gin",
+            postgresql_ops={"geo": "jsonb_path_ops"},
+        ),
+        # Partial index for the PDF pipeline's suffix lookup (see fetch_pdf_sources)
+        Index(
+            "idx_source_pdf",
+            "id",
+            postgresql_where=text("lower(source_url) LIKE '%.pdf'"),
+        ),
     )
 
 
 class Chunk(Base):
     __tablename__ = "chunks"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=UUID_DEFAULT)
     source_id = Column(
         UUID(as_uuid=True), ForeignKey("sources.id", ondelete="CASCADE"), nullable=False
     )
@@ -65,22 +81,32 @@ class Chunk(Base):
     tags = Column(JSONB)
     sentiment = Column(JSONB)
     leadership_polarity = Column(JSONB)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=UTC_NOW)
 
     # Relationships
     source = relationship("Source", back_populates="chunks")
 
     __table_args__ = (
         Index("idx_chunk_source", "source_id"),
-        Index("idx_chunk_tags", "tags", postgresql_using="gin"),
-        Index("idx_chunk_entities", "entities", postgresql_using="gin"),
+        Index(
+            "idx_chunk_tags",
+            "tags",
+            postgresql_using="gin",
+            postgresql_ops={"tags": "jsonb_path_ops"},
+        ),
+        Index(
+            "idx_chunk_entities",
+            "entities",
+            postgresql_using="gin",
+            postgresql_ops={"entities": "jsonb_path_ops"},
+        ),
     )
 
 
 class Narrative(Base):
     __tablename__ = "narratives"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=UUID_DEFAULT)
     title = Column(Text)
     summary = Column(Text)
     issues = Column(JSONB)
@@ -91,31 +117,41 @@ class Narrative(Base):
     criticality_score = Column(Float)
     political_impact_score = Column(Float)
     governance_impact_score = Column(Float)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=UTC_NOW)
 
     __table_args__ = (
-        Index("idx_narrative_issues", "issues", postgresql_using="gin"),
-        Index("idx_narrative_geo", "geo", postgresql_using="gin"),
+        Index(
+            "idx_narrative_issues",
+            "issues",
+            postgresql_using="gin",
+            postgresql_ops={"issues": "jsonb_path_ops"},
+        ),
+        Index(
+            "idx_narrative_geo",
+            "geo",
+            postgresql_using="gin",
+            postgresql_ops={"geo": "jsonb_path_ops"},
+        ),
     )
 
 
 class ScrapingLog(Base):
     __tablename__ = "scraping_logs"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=UUID_DEFAULT)
     source_url = Column(Text, nullable=False)
     scraper_type = Column(String(50))
     status = Column(String(20))  # success, failed, partial
     items_scraped = Column(Integer, default=0)
     error_message = Column(Text)
-    scraped_at = Column(DateTime, default=datetime.utcnow)
+    scraped_at = Column(DateTime, server_default=UTC_NOW)
     extra_metadata = Column(JSONB)
 
 
 class PDFExtraction(Base):
     __tablename__ = "pdf_extractions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, index=True, server_default=UUID_DEFAULT)
     source_id = Column(
         UUID(as_uuid=True), ForeignKey("sources.id", ondelete="CASCADE"), nullable=False
     )
@@ -1,8 +1,5 @@
-from sqlalchemy import create_engine, text
-from config.settings import settings
-
-DATABASE_URL = f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
-engine = create_engine(DATABASE_URL)
+from sqlalchemy import text
+from config.db_config import engine
 
 with engine.connect() as conn:
     result = conn.execute(text("SELECT version();"))
@@ -1,5 +1,5 @@
 from loguru import logger
-from config.db_config import SessionLocal
+from config.db_config import ScopedSession, POOL_SIZE
 from database.db_operations import DatabaseOperations
 from scrapers.govt_scraper import GovernmentScraper
 from scrapers.media_scraper import MediaScraper
@@ -13,11 +13,16 @@ from typing import List, Dict, Optional
 import sys
 from datetime import datetime
 import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 class DataScrapingOrchestrator:
     def __init__(self, skip_embeddings: bool = False):
-        self.db = SessionLocal()
+        # Thread-local session proxy: pipeline workers each get their own Session
+        self.db = ScopedSession
         self.db_ops = DatabaseOperations(self.db)
+        self.max_workers = POOL_SIZE
         
         # Initialize scrapers
         self.scrapers = {
@@ -43,6 +48,7 @@ class DataScrapingOrchestrator:
             "failed_chunks": 0,
             "start_time": datetime.utcnow()
         }
+        self._stats_lock = threading.Lock()
     
     def run_full_pipeline(self, scraper_types: List[str] = None, 
                          limit_per_scraper: Optional[int] = None):
@@ -96,26 +102,49 @@ class DataScrapingOrchestrator:
             
             logger.info(f"Found {len(sources)} sources to process")
             
-            # Step 2: Process each source
-            for idx, source_data in enumerate(sources, 1):
-                logger.info(f"\n--- Processing source {idx}/{len(sources)} ---")
-                
-                success = self._process_single_source(
-                    source_data, 
-                    scraper_type,
-                    idx,
-                    len(sources)
-                )
+            # Step 2: Normalize, drop empty pages and already stored URLs (one round-trip)
+            sources = [self.normalizer.normalize_source(s) for s in sources]
+            kept = []
+            for source_data in sources:
+                if self._should_skip_source(source_data):
+                    self._log_skipped_source(source_data, scraper_type)
+                else:
+                    kept.append(source_data)
+            sources = kept
+            
+            new_sources = self.db_ops.filter_new_sources(sources)
+            new_urls = {s['source_url'] for s in new_sources}
+            for source_data in sources:
+                if source_data['source_url'] not in new_urls:
+                    scraper.mark_seen(source_data['source_url'])  # already stored
+            sources = new_sources
+            # End the read-only transaction so this thread's connection goes back to the pool
+            self.db_ops.commit()
+            
+            # Step 3: Process new sources concurrently, each in its own transaction
+            # (workers are bounded by the DB pool size, one session each)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self._process_source_task,
+                        source_data,
+                        scraper_type,
+                        idx,
+                        len(sources),
+                    )
+                    for idx, source_data in enumerate(sources, 1)
+                ]
                 
-                if success:
-                    scraper_sources += 1
-                    # Count chunks from this source
-                    # (approximation - actual count would require tracking)
-                    scraper_chunks += success
+                for future in as_completed(futures):
+                    success = future.result()
+                    if success:
+                        scraper_sources += 1
+                        # Count chunks from this source
+                        # (approximation - actual count would require tracking)
+                        scraper_chunks += success
         
         except Exception as e:
             logger.error(f"❌ Error in {scraper_type} scraper: {e}")
-            import traceback
             logger.error(traceback.format_exc())
         
         finally:
@@ -127,64 +156,100 @@ class DataScrapingOrchestrator:
             logger.info(f"   Chunks created: {scraper_chunks}")
             logger.info(f"{'─' * 80}")
     
+    def _process_source_task(self, source_data: Dict, scraper_type: str,
+                             current: int, total: int) -> Optional[int]:
+        """Worker entry point: process one normalized source on this thread's session"""
+        logger.info(f"\n--- Processing source {current}/{total} ---")
+        try:
+            return self._process_single_source(
+                source_data, scraper_type, current, total, normalized=True
+            )
+        finally:
+            # Return this thread's connection to the pool
+            self.db.remove()
+    
+    def _incr_stat(self, key: str, amount: int = 1):
+        """Thread-safe stats counter update"""
+        with self._stats_lock:
+            self.stats[key] += amount
+    
+    def _tag_chunks(self, chunks: List[Dict], source_data: Dict) -> List[Dict]:
+        """Tag a batch of chunks with one LLM call and attach tags/entities"""
+        logger.debug("  Tagging chunks {}-{}...", chunks[0]['seq'], chunks[-1]['seq'])
+        all_tags = self.tagger.tag_chunks_batch(
+            [(chunk['text'], source_data) for chunk in chunks]
+        )
+        
+        tagged = []
+        for chunk, tags in zip(chunks, all_tags):
+            try:
+                chunk['tags'] = tags
+                chunk['entities'] = self.normalizer.extract_entities(chunk['text'])
+                chunk['sentiment'] = tags.get('sentiment', {})
+                chunk['leadership_polarity'] = tags.get('leadership_polarity', {})
+                tagged.append(chunk)
+            
+            except Exception as e:
+                logger.error(f"Error tagging chunk {chunk['seq']}: {e}")
+                self._incr_stat("failed_chunks")
+        return tagged
+    
     def _process_single_source(self, source_data: Dict, scraper_type: str, 
-                              current: int, total: int) -> Optional[int]:
-        """Process a single source through the full pipeline"""
+                              current: int, total: int,
+                              normalized: bool = False) -> Optional[int]:
+        """
+        Process a single source through the full pipeline.
+        Pass normalized=True when the source was already normalized and
+        checked for content (as _process_scraper_type does) to skip step 1.
+        The source row is only committed together with its chunks.
+        """
         try:
-            # Step 1: Normalize
-            logger.debug("Step 1: Normalizing source data...")
-            source_data = self.normalizer.normalize_source(source_data)
+            if not normalized:
+                # Step 1: Normalize
+                logger.debug("Step 1: Normalizing source data...")
+                source_data = self.normalizer.normalize_source(source_data)
+                
+                if self._should_skip_source(source_data):
+                    self._log_skipped_source(source_data, scraper_type)
+                    self.db_ops.commit()
+                    return 0
             
-            # Step 2: Save source
+            # Step 2: Save source (flushed now, committed with its chunks below)
             logger.debug("Step 2: Saving source to database...")
             source_id = self.db_ops.save_source(source_data)
-            if not source_id:
-                logger.warning("⚠️  Source already exists or failed to save")
-                return None
             
-            self.stats["total_sources"] += 1
+            self._incr_stat("total_sources")
             
             # Step 3: Extract and chunk content
             content = source_data.get('raw_content', '')
             if not content or len(content.strip()) < 50:
                 logger.warning("⚠️  Source has insufficient content for chunking")
+                self.db_ops.commit()
                 return 0
             
-            logger.debug(f"Step 3: Chunking content ({len(content)} chars)...")
-            chunks = self.chunker.chunk_text(content, str(source_id))
+            # Steps 3-4: Chunk lazily and tag chunks in batches as they are produced
+            logger.debug(f"Step 3-4: Chunking ({len(content)} chars) and tagging...")
+            tagged_chunks = []
+            pending = []
+            chunk_count = 0
+            for chunk_count, chunk in enumerate(self.chunker.chunk_text(content, str(source_id)), 1):
+                pending.append(chunk)
+                if len(pending) >= self.tagger.batch_size:
+                    tagged_chunks.extend(self._tag_chunks(pending, source_data))
+                    pending = []
+            if pending:
+                tagged_chunks.extend(self._tag_chunks(pending, source_data))
             
-            if not chunks:
+            if not chunk_count:
                 logger.warning("⚠️  No chunks created from source")
+                self.db_ops.commit()
                 return 0
             
-            logger.info(f"Created {len(chunks)} chunks")
-            
-            # Step 4: Tag each chunk
-            logger.debug(f"Step 4: Tagging {len(chunks)} chunks...")
-            tagged_chunks = []
-            for chunk_idx, chunk in enumerate(chunks, 1):
-                try:
-                    logger.debug(f"  Tagging chunk {chunk_idx}/{len(chunks)}...")
-                    
-                    tags = self.tagger.tag_chunk(
-                        chunk['text'],
-                        source_data
-                    )
-                    
-                    chunk['tags'] = tags
-                    chunk['entities'] = self.normalizer.extract_entities(chunk['text'])
-                    chunk['sentiment'] = tags.get('sentiment', {})
-                    chunk['leadership_polarity'] = tags.get('leadership_polarity', {})
-                    
-                    tagged_chunks.append(chunk)
-                
-                except Exception as e:
-                    logger.error(f"Error tagging chunk {chunk_idx}: {e}")
-                    self.stats["failed_chunks"] += 1
-                    continue
+            logger.info(f"Created {chunk_count} chunks")
             
             if not tagged_chunks:
                 logger.warning("⚠️  No chunks successfully tagged")
+                self.db_ops.commit()
                 return 0
             
             # Step 5: Generate embeddings (if enabled)
@@ -192,8 +257,8 @@ class DataScrapingOrchestrator:
                 logger.debug(f"Step 5: Generating embeddings for {len(tagged_chunks)} chunks...")
                 try:
                     tagged_chunks = self.embedder.embed_chunks_batch(tagged_chunks)
-                    embeddings_count = sum(1 for c in tagged_chunks if c.get('embedding_vector'))
-                    self.stats["total_embeddings"] += embeddings_count
+                    embeddings_count = sum(1 for c in tagged_chunks if c.get('embedding_vector') is not None)
+                    self._incr_stat("total_embeddings", embeddings_count)
                     logger.info(f"Generated {embeddings_count} embeddings")
                 except Exception as e:
                     logger.error(f"Error generating embeddings: {e}")
@@ -201,7 +266,7 @@ class DataScrapingOrchestrator:
             # Step 6: Save chunks to database
             logger.debug(f"Step 6: Saving {len(tagged_chunks)} chunks to database...")
             saved_count = self.db_ops.save_chunks(tagged_chunks)
-            self.stats["total_chunks"] += saved_count
+            self._incr_stat("total_chunks", saved_count)
             
             # Step 7: Log success
             self.db_ops.log_scraping(
@@ -211,6 +276,12 @@ class DataScrapingOrchestrator:
                 items_scraped=saved_count
             )
             
+            # Source, chunks and log land in a single transaction
+            self.db_ops.commit()
+            # Only now is the URL safe to skip on later runs
+            if scraper_type in self.scrapers:
+                self.scrapers[scraper_type].mark_seen(source_data['source_url'])
+            
             logger.info(f"✅ Successfully processed: {source_data['title'][:60]}...")
             logger.info(f"   Saved {saved_count} chunks")
             
@@ -218,21 +289,44 @@ class DataScrapingOrchestrator:
         
         except Exception as e:
             logger.error(f"❌ Error processing source: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             
-            self.stats["failed_sources"] += 1
+            self._incr_stat("failed_sources")
             
-            # Log failure
-            self.db_ops.log_scraping(
-                url=source_data.get('source_url', 'unknown'),
-                scraper_type=scraper_type,
-                status="failed",
-                error_message=str(e)
-            )
+            # Discard the partial source, then log failure on its own
+            self.db_ops.rollback()
+            try:
+                self.db_ops.log_scraping(
+                    url=source_data.get('source_url', 'unknown'),
+                    scraper_type=scraper_type,
+                    status="failed",
+                    error_message=str(e)
+                )
+                self.db_ops.commit()
+            except Exception:
+                self.db_ops.rollback()
             
             return None
     
+    def _should_skip_source(self, source_data: Dict) -> bool:
+        """
+        True for pages without enough text to chunk (redirects, 403s, empty
+        pages). File links are kept: the PDF pipeline reads them from sources.
+        """
+        if source_data.get('raw_blob_url'):
+            return False
+        content = source_data.get('raw_content', '')
+        return not content or len(content.strip()) < 50
+    
+    def _log_skipped_source(self, source_data: Dict, scraper_type: str):
+        """Record a source skipped for insufficient content (no Source row)"""
+        logger.warning(f"⚠️  Skipping source with insufficient content: {source_data.get('source_url')}")
+        self.db_ops.log_scraping(
+            url=source_data.get('source_url', 'unknown'),
+            scraper_type=scraper_type,
+            status="skipped_empty"
+        )
+    
     def _print_final_report(self):
         """Print final statistics report"""
         end_time = datetime.utcnow()
@@ -288,18 +382,18 @@ class DataScrapingOrchestrator:
             logger.error("Failed to fetch URL")
             return
         
-        soup = scraper.parse_html(html)
-        content = soup.get_text(separator='\n', strip=True)
+        tree = scraper.parse_html_fast(html)
+        content = tree.text(separator='\n', strip=True)
+        title_tag = tree.css_first('title')
         
         source_data['raw_content'] = content
-        source_data['raw_html'] = html
-        source_data['title'] = soup.find('title').get_text() if soup.find('title') else url
+        source_data['title'] = title_tag.text() if title_tag else url
         
         self._process_single_source(source_data, source_type, 1, 1)
     
     def close(self):
         """Close database connection"""
-        self.db.close()
+        self.db.remove()
         logger.info("Database connection closed")
 
 
@@ -360,7 +454,6 @@ def main():
     
     except Exception as e:
         logger.error(f"❌ Pipeline failed: {e}")
-        import traceback
         logger.error(traceback.format_exc())
     
     finally:
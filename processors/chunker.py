@@ -1,62 +1,71 @@
-from typing import List, Dict
+from typing import Dict, Iterator
 from loguru import logger
-from config.settings import settings
+from config.settings import get_settings
+import re
+
+# Sentence endings: period, question mark, exclamation, or Hindi danda (U+0964)
+_SENT_RE = re.compile(r'[\u0964.!?]+')
 
 class Chunker:
     def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+        settings = get_settings()
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
     
-    def chunk_text(self, text: str, source_id: str) -> List[Dict]:
-        """Split text into chunks with overlap"""
+    def chunk_text(self, text: str, source_id: str) -> Iterator[Dict]:
+        """Lazily yield chunks of text with overlap"""
         if not text or len(text.strip()) < 50:
-            return []
+            return
+        
+        # Sentences plus a running word count: bounds[i] is the number of words
+        # before sentence i (bounds[-1] == total words). Chunk sizes are integer
+        # arithmetic on bounds; sentence text is joined once per emitted chunk,
+        # so whitespace inside sentences is kept as-is.
+        sentences = list(self._split_sentences(text))
+        bounds = [0]
+        for sentence in sentences:
+            bounds.append(bounds[-1] + len(sentence.split()))
         
-        # Split by sentences (simple approach)
-        sentences = self._split_sentences(text)
-        chunks = []
-        current_chunk = []
-        current_length = 0
+        first = 0  # first sentence of the current chunk
         seq = 0
         
-        for sentence in sentences:
-            sentence_length = len(sentence.split())
+        for i in range(len(sentences)):
+            current_length = bounds[i] - bounds[first]
+            sentence_length = bounds[i + 1] - bounds[i]
             
-            if current_length + sentence_length > self.chunk_size and current_chunk:
-                # Create chunk
-                chunk_text = ' '.join(current_chunk)
-                chunks.append({
+            if current_length + sentence_length > self.chunk_size and i > first:
+                # Create chunk from sentences [first, i)
+                yield {
                     "source_id": source_id,
                     "seq": seq,
-                    "text": chunk_text,
-                    "word_count": len(chunk_text.split())
-                })
+                    "text": ' '.join(sentences[first:i]),
+                    "word_count": current_length
+                }
                 seq += 1
                 
-                # Start new chunk with overlap
-                overlap_sentences = current_chunk[-2:] if len(current_chunk) >= 2 else current_chunk
-                current_chunk = overlap_sentences + [sentence]
-                current_length = sum(len(s.split()) for s in current_chunk)
-            else:
-                current_chunk.append(sentence)
-                current_length += sentence_length
+                # Start new chunk with a two-sentence overlap
+                first = max(first, i - 2)
         
         # Add remaining chunk
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append({
+        if len(sentences) > first:
+            yield {
                 "source_id": source_id,
                 "seq": seq,
-                "text": chunk_text,
-                "word_count": len(chunk_text.split())
-            })
+                "text": ' '.join(sentences[first:]),
+                "word_count": bounds[-1] - bounds[first]
+            }
+            seq += 1
         
-        logger.debug(f"Created {len(chunks)} chunks from source {source_id}")
-        return chunks
+        logger.debug(f"Created {seq} chunks from source {source_id}")
     
-    def _split_sentences(self, text: str) -> List[str]:
-        """Split text into sentences"""
-        import re
-        # Split on period, question mark, exclamation, or Hindi sentence endings
-        sentences = re.split(r'[।.!?]+', text)
-        return [s.strip() for s in sentences if s.strip()]
\ No newline at end of file
+    def _split_sentences(self, text: str) -> Iterator[str]:
+        """Lazily yield stripped, non-empty sentences"""
+        start = 0
+        for match in _SENT_RE.finditer(text):
+            sentence = text[start:match.start()].strip()
+            if sentence:
+                yield sentence
+            start = match.end()
+        sentence = text[start:].strip()
+        if sentence:
+            yield sentence
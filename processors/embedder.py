@@ -1,118 +1,324 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from loguru import logger
 import google.generativeai as genai
-from config.settings import settings
+from google.api_core import exceptions as google_exceptions
+from config.settings import get_settings
+from processors.gemini import configure_gemini
 import numpy as np
 from database.models import Chunk
 from database.db_operations import DatabaseOperations
+import diskcache
+import hashlib
+import asyncio
+import threading
 import time
 
+try:
+    import simsimd  # optional SIMD similarity kernels
+except ImportError:
+    simsimd = None
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls evenly to stay under a per-minute quota.
+    Each caller reserves the next free slot under the lock, then sleeps outside it.
+    """
+    
+    def __init__(self, max_per_minute: int):
+        self.interval = 60.0 / max_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class EmbeddingCountMismatch(ValueError):
+    """The API returned a different number of vectors than texts sent"""
+
+
 class Embedder:
     """
     Generate embeddings for text chunks using Google's Gemini embedding model.
     Stores embedding IDs for later use with vector databases like Pinecone.
     """
     
+    # The API quota is per key, so every Embedder and every pipeline thread
+    # shares one rate limiter and one concurrency bound (set up on first init)
+    _rate_limiter: Optional[RateLimiter] = None
+    _api_slots: Optional[threading.BoundedSemaphore] = None
+    _limits_lock = threading.Lock()
+    
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
+        settings = get_settings()
+        configure_gemini()
         self.embedding_model = "models/embedding-004"
         self.batch_size = 100
-        self.rate_limit_delay = 1  # seconds between batches
+        self.max_chars = 10000
+        self.requests_per_minute = settings.EMBED_REQUESTS_PER_MINUTE
+        self.max_concurrency = settings.EMBED_MAX_CONCURRENCY
+        self.max_retries = 5
+        self.retry_base_delay = 1  # seconds, doubled on each 429
+        # Content-addressed cache so re-runs don't re-embed identical text
+        self.cache = diskcache.Cache(settings.EMBED_CACHE_DIR)
+        # Precision of stored chunk vectors (int8 adds a per-vector scale)
+        self.dtype = np.dtype(settings.EMBED_DTYPE)
+        with Embedder._limits_lock:
+            if Embedder._rate_limiter is None:
+                Embedder._rate_limiter = RateLimiter(self.requests_per_minute)
+                Embedder._api_slots = threading.BoundedSemaphore(self.max_concurrency)
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding for a single text"""
-        try:
-            if not text or len(text.strip()) < 10:
-                logger.warning("Text too short for embedding")
-                return None
-            
-            # Truncate if too long (Gemini has token limits)
-            max_chars = 10000
-            if len(text) > max_chars:
-                text = text[:max_chars]
-            
-            result = genai.embed_content(
-                model=self.embedding_model,
-                content=text,
-                task_type="retrieval_document"
-            )
-            
-            embedding = result['embedding']
-            logger.debug(f"Generated embedding with dimension: {len(embedding)}")
-            return embedding
+    def generate_embedding(self, text: Union[str, List[str]]):
+        """Generate embedding for a single text (or a list of texts)"""
+        if isinstance(text, list):
+            return self.generate_batch_embeddings(text)
         
-        except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
+        prepared = self._prepare_text(text)
+        if prepared is None:
+            logger.warning("Text too short for embedding")
             return None
+        
+        embedding = self._embed_cached([prepared])[0]
+        if embedding is not None:
+            logger.debug("Generated embedding with dimension: {}", len(embedding))
+        return embedding
     
-    def generate_batch_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
-        """Generate embeddings for multiple texts with rate limiting"""
-        embeddings = []
+    def generate_batch_embeddings(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Generate embeddings for multiple texts, one API call per batch.
+        Batches run concurrently under the configured quota.
+        """
+        prepared = [self._prepare_text(t) for t in texts]
+        # Too-short texts are not sent and get None
+        valid = [t for t in prepared if t is not None]
+        vectors = iter(self._embed_cached(valid))
+        return [next(vectors) if t is not None else None for t in prepared]
+    
+    def _cache_key(self, text: str) -> str:
+        """Cache key; includes the model so switching models invalidates entries"""
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"{self.embedding_model}:{digest}"
+    
+    def _embed_cached(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Serve embeddings from the disk cache, calling the API only for misses.
+        Vectors are returned as float32 arrays; lists only exist at the API boundary.
+        """
+        keys = [self._cache_key(t) for t in texts]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        misses = []
+        for i, key in enumerate(keys):
+            packed = self.cache.get(key)
+            if packed is None:
+                misses.append(i)
+            else:
+                embeddings[i] = np.frombuffer(packed, dtype=np.float16).astype(np.float32)
         
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
-            logger.info(f"Processing embedding batch {i//self.batch_size + 1}/{(len(texts)-1)//self.batch_size + 1}")
-            
-            for text in batch:
-                embedding = self.generate_embedding(text)
-                embeddings.append(embedding)
-            
-            # Rate limiting
-            if i + self.batch_size < len(texts):
-                time.sleep(self.rate_limit_delay)
+        if texts:
+            logger.info(f"Embedding cache: {len(texts) - len(misses)}/{len(texts)} hits")
+        if not misses:
+            return embeddings
+        
+        batches = [
+            [texts[i] for i in misses[j:j + self.batch_size]]
+            for j in range(0, len(misses), self.batch_size)
+        ]
+        results = asyncio.run(self._embed_batches_async(batches))
+        # A batch that failed as a whole (quota, network, auth) leaves its texts unembedded
+        vectors = (
+            v
+            for batch, result in zip(batches, results)
+            for v in (result if not isinstance(result, Exception) else [None] * len(batch))
+        )
         
+        for i, vector in zip(misses, vectors):
+            if vector is not None:
+                packed = np.asarray(vector, dtype=np.float16).tobytes()
+                self.cache.set(keys[i], packed)
+                # Same float16-rounded values a later cache hit returns
+                embeddings[i] = np.frombuffer(packed, dtype=np.float16).astype(np.float32)
         return embeddings
     
-    def embed_chunk(self, chunk: Dict) -> Dict:
-        """Generate embedding for a chunk and add it to chunk data"""
-        embedding = self.generate_embedding(chunk['text'])
-        
-        if embedding:
-            # Store embedding vector (for later upload to vector DB)
-            chunk['embedding_vector'] = embedding
-            chunk['embedding_dimension'] = len(embedding)
-            chunk['embedding_model'] = self.embedding_model
-            logger.debug(f"Embedded chunk {chunk.get('id', 'unknown')}")
-        else:
-            chunk['embedding_vector'] = None
-            chunk['embedding_dimension'] = 0
+    async def _embed_batches_async(self, batches: List[List[str]]) -> List[List]:
+        """
+        Dispatch batches concurrently. Each API call waits for the shared
+        concurrency slot and rate limiter, so the quota holds across calls and threads.
+        """
+        async def run(idx: int, batch: List[str]) -> List:
+            logger.info("Processing embedding batch {}/{}", idx + 1, len(batches))
+            return await self._embed_batch_async(batch)
         
-        return chunk
+        results = await asyncio.gather(
+            *(run(i, b) for i, b in enumerate(batches)), return_exceptions=True
+        )
+        for idx, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Embedding batch {idx + 1}/{len(batches)} failed: {result}")
+        return results
     
-    def embed_chunks_batch(self, chunks: List[Dict]) -> List[Dict]:
-        """Embed multiple chunks efficiently"""
-        texts = [chunk['text'] for chunk in chunks]
-        embeddings = self.generate_batch_embeddings(texts)
+    async def _embed_batch_async(self, batch: List[str]) -> List[Optional[List[float]]]:
+        """Embed one batch off the event loop (the SDK client is blocking)"""
+        return await asyncio.to_thread(self._embed_texts, batch)
+    
+    def _prepare_text(self, text: str) -> Optional[str]:
+        """Return text truncated to the model limit, or None if too short"""
+        if not text or len(text.strip()) < 10:
+            return None
+        # Truncate if too long (Gemini has token limits)
+        return text[:self.max_chars]
+    
+    def _embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed a list of texts in a single API call.
+        If the API rejects the input (or returns the wrong number of vectors),
+        bisect and retry each half so one bad text only costs its own embedding.
+        Quota, network and auth errors are raised as-is: every half would fail too.
+        """
+        try:
+            return self._call_embed_api(texts)
         
+        except (google_exceptions.InvalidArgument, EmbeddingCountMismatch) as e:
+            if len(texts) == 1:
+                logger.error(f"Error generating embedding: {e}")
+                return [None]
+            mid = len(texts) // 2
+            return self._embed_texts(texts[:mid]) + self._embed_texts(texts[mid:])
+    
+    def _call_embed_api(self, texts: List[str]) -> List[List[float]]:
+        """Call embed_content, backing off exponentially on 429 quota errors"""
+        for attempt in range(self.max_retries):
+            try:
+                # Slot is held only for the call itself, not during backoff
+                with self._api_slots:
+                    self._rate_limiter.acquire()
+                    result = genai.embed_content(
+                        model=self.embedding_model,
+                        content=texts,
+                        task_type="retrieval_document"
+                    )
+                embeddings = result['embedding']
+                if len(embeddings) != len(texts):
+                    raise EmbeddingCountMismatch(
+                        f"Got {len(embeddings)} embeddings for {len(texts)} texts"
+                    )
+                return embeddings
+            except google_exceptions.ResourceExhausted:
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = self.retry_base_delay * (2 ** attempt)
+                logger.warning(f"Embedding quota hit, retrying in {delay}s")
+                time.sleep(delay)
+    
+    @staticmethod
+    def normalize(embedding: Union[List[float], np.ndarray]) -> np.ndarray:
+        """L2-normalize a vector so cosine similarity becomes a dot product"""
+        arr = np.asarray(embedding, dtype=np.float32)
+        return arr / (np.linalg.norm(arr) + 1e-12)
+    
+    def quantize(self, embeddings: np.ndarray) -> tuple:
+        """
+        Convert normalized vectors (one vector, or an (N, dim) matrix of rows)
+        to the storage dtype. Returns (vectors, scales); scales is only set for int8.
+        """
+        arr = np.asarray(embeddings, dtype=np.float32)
+        if self.dtype == np.int8:
+            scales = 127.0 / np.maximum(np.max(np.abs(arr), axis=-1), 1e-12)
+            return np.round(arr * scales[..., None]).astype(np.int8), scales
+        return arr.astype(self.dtype, copy=False), None
+    
+    @staticmethod
+    def dequantize(vector: np.ndarray, scale: Optional[float] = None) -> np.ndarray:
+        """Restore a stored vector to float32 (e.g. for upload to a vector DB)"""
+        arr = np.asarray(vector, dtype=np.float32)
+        return arr / scale if scale else arr
+    
+    def _attach_embeddings(self, chunks: List[Dict], embeddings: List[Optional[np.ndarray]]):
+        """
+        Store normalized embedding vectors on the chunks (for later upload to vector DB).
+        The batch is normalized and quantized as one contiguous (N, dim) matrix;
+        each chunk keeps a row of it.
+        """
+        embedded = []
         for chunk, embedding in zip(chunks, embeddings):
-            if embedding:
-                chunk['embedding_vector'] = embedding
-                chunk['embedding_dimension'] = len(embedding)
-                chunk['embedding_model'] = self.embedding_model
-            else:
+            if embedding is None:
                 chunk['embedding_vector'] = None
                 chunk['embedding_dimension'] = 0
+            else:
+                embedded.append(chunk)
+        if not embedded:
+            return
+        
+        matrix = np.stack([e for e in embeddings if e is not None]).astype(np.float32, copy=False)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        vectors, scales = self.quantize(matrix)
         
+        for i, chunk in enumerate(embedded):
+            chunk['embedding_vector'] = vectors[i]
+            chunk['embedding_dimension'] = vectors.shape[1]
+            chunk['embedding_model'] = self.embedding_model
+            chunk['embedding_normalized'] = True
+            if scales is not None:
+                chunk['embedding_scale'] = float(scales[i])
+    
+    def embed_chunk(self, chunk: Dict) -> Dict:
+        """Generate embedding for a chunk and add it to chunk data"""
+        self.embed_chunks_batch([chunk])
+        if chunk['embedding_vector'] is not None:
+            logger.debug("Embedded chunk {}", chunk.get('id', 'unknown'))
+        return chunk
+    
+    def embed_chunks_batch(self, chunks: List[Dict]) -> List[Dict]:
+        """Embed multiple chunks efficiently, writing results into the chunk dicts"""
+        self._attach_embeddings(chunks, self.generate_batch_embeddings([c['text'] for c in chunks]))
         return chunks
     
-    def generate_query_embedding(self, query: str) -> Optional[List[float]]:
-        """Generate embedding for a search query"""
+    def generate_query_embedding(self, query: str) -> Optional[np.ndarray]:
+        """Generate a normalized embedding for a search query"""
         try:
             result = genai.embed_content(
                 model=self.embedding_model,
                 content=query,
                 task_type="retrieval_query"  # Different task type for queries
             )
-            return result['embedding']
+            return self.normalize(result['embedding'])
         except Exception as e:
             logger.error(f"Error generating query embedding: {e}")
             return None
     
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
-        """Calculate cosine similarity between two embeddings"""
+    def calculate_similarity(self, embedding1: Union[List[float], np.ndarray],
+                             embedding2: Union[List[float], np.ndarray],
+                             normalized: bool = True) -> float:
+        """
+        Calculate cosine similarity between two embeddings.
+        Stored chunk and query embeddings are already L2-normalized, so by
+        default this is a plain dot product; pass normalized=False for raw vectors.
+        int8 vectors lose their scale, so they always use the (scale-free) cosine.
+        """
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
+            vec1 = np.asarray(embedding1)
+            vec2 = np.asarray(embedding2)
+            
+            # SimSIMD has native f16 / i8 kernels for same-dtype inputs
+            if simsimd is not None and vec1.dtype == vec2.dtype and vec1.dtype in (np.float16, np.int8):
+                return 1.0 - float(simsimd.cosine(vec1, vec2))
+            
+            if vec1.dtype == np.int8 or vec2.dtype == np.int8:
+                normalized = False
+            vec1 = vec1.astype(np.float32, copy=False)
+            vec2 = vec2.astype(np.float32, copy=False)
+            
+            if normalized:
+                return float(np.dot(vec1, vec2))
+            
+            if simsimd is not None:
+                # SimSIMD returns cosine distance
+                return 1.0 - float(simsimd.cosine(vec1, vec2))
             
             dot_product = np.dot(vec1, vec2)
             norm1 = np.linalg.norm(vec1)
@@ -123,6 +329,22 @@ class Embedder:
         except Exception as e:
             logger.error(f"Error calculating similarity: {e}")
             return 0.0
+    
+    def calculate_similarity_batch(self, query: Union[List[float], np.ndarray],
+                                   matrix: np.ndarray, normalized: bool = True) -> np.ndarray:
+        """Cosine similarity of one query against every row of an (N, dim) matrix"""
+        query = np.asarray(query, dtype=np.float32)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        
+        if normalized:
+            return matrix @ query
+        
+        if simsimd is not None:
+            distances = np.asarray(simsimd.cdist(query[None, :], matrix, metric="cosine"))
+            return 1.0 - distances[0]
+        
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        return (matrix @ query) / np.maximum(norms, 1e-12)
 
 
 class VectorStoreManager:
@@ -135,24 +357,30 @@ class VectorStoreManager:
     def __init__(self, db_ops: DatabaseOperations):
         self.db_ops = db_ops
         self.embedder = Embedder()
+        
+        # In-memory brute-force index: one C-contiguous, L2-normalized float32
+        # (N, dim) matrix; new rows are buffered and stacked on the next search
+        self._corpus: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._metadata: List[Dict] = []
+        self._pending: List[np.ndarray] = []
     
-    def store_chunk_embedding(self, chunk_id: str, embedding: List[float], 
+    def store_chunk_embedding(self, chunk_id: str, embedding: Union[List[float], np.ndarray], 
                              metadata: Dict) -> bool:
         """
         Store embedding with metadata.
         In production, this would upload to Pinecone/Weaviate.
-        For MVP, we store the vector in PostgreSQL.
+        For MVP, vectors are kept in an in-memory matrix for brute-force search.
         """
         try:
-            # For now, we'll store embedding_id as a reference
             # In production: upload to Pinecone and store the returned ID
             
-            embedding_id = f"emb_{chunk_id}"
+            # Re-normalizing makes int8/float16 rows comparable with float32 ones
+            self._pending.append(Embedder.normalize(embedding))
+            self._ids.append(str(chunk_id))
+            self._metadata.append(metadata or {})
             
-            # Update chunk with embedding_id
-            # (In production, you'd call Pinecone API here)
-            
-            logger.debug(f"Stored embedding for chunk {chunk_id}")
+            logger.debug("Stored embedding for chunk {}", chunk_id)
             return True
         
         except Exception as e:
@@ -169,23 +397,54 @@ class VectorStoreManager:
         2. Query Pinecone with filters
         3. Return top_k results with metadata
         
-        For MVP: Simple placeholder that would be replaced with actual vector search
+        For MVP: brute-force scan of the in-memory corpus, one matrix-vector
+        product for all scores and argpartition for the top_k.
+        Filters are exact-match on metadata keys.
         """
         query_embedding = self.embedder.generate_query_embedding(query)
         
-        if not query_embedding:
+        if query_embedding is None:
             return []
         
-        # Placeholder: In production, this would be:
+        logger.info("Vector search for query: {:.50}...", query)
+        
+        # In production with Pinecone, this would be:
         # results = pinecone_index.query(
-        #     vector=query_embedding,
+        #     vector=query_embedding.tolist(),
         #     top_k=top_k,
         #     filter=filters,
         #     include_metadata=True
         # )
         
-        logger.info(f"Vector search for query: {query[:50]}...")
-        return []
+        corpus = self._get_corpus()
+        if corpus is None or top_k <= 0:
+            return []
+        
+        scores = self.embedder.calculate_similarity_batch(query_embedding, corpus)
+        if filters:
+            mask = np.fromiter(
+                (all(meta.get(k) == v for k, v in filters.items()) for meta in self._metadata),
+                dtype=bool, count=len(self._metadata)
+            )
+            scores = np.where(mask, scores, -np.inf)
+        
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return [
+            {"id": self._ids[i], "score": float(scores[i]), "metadata": self._metadata[i]}
+            for i in top if np.isfinite(scores[i])
+        ]
+    
+    def _get_corpus(self) -> Optional[np.ndarray]:
+        """Stack any newly stored vectors into the corpus matrix"""
+        if self._pending:
+            new_rows = np.vstack(self._pending)
+            self._corpus = new_rows if self._corpus is None else np.vstack([self._corpus, new_rows])
+            self._corpus = np.ascontiguousarray(self._corpus, dtype=np.float32)
+            self._pending = []
+        return self._corpus
     
     def create_namespace_index(self, namespace: str):
         """Create a namespace in vector DB (for layer separation)"""
@@ -251,10 +510,12 @@ class PineconeIntegration:
         # Uncomment when using Pinecone:
         # vectors = []
         # for chunk in chunks_with_embeddings:
-        #     if chunk.get('embedding_vector'):
+        #     if chunk.get('embedding_vector') is not None:
+        #         # Pinecone takes float32 values; convert reduced-precision vectors here
+        #         values = Embedder.dequantize(chunk['embedding_vector'], chunk.get('embedding_scale'))
         #         vectors.append({
         #             'id': str(chunk['id']),
-        #             'values': chunk['embedding_vector'],
+        #             'values': values.tolist(),
         #             'metadata': chunk.get('metadata', {})
         #         })
         # 
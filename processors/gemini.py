@@ -0,0 +1,16 @@
+from functools import lru_cache
+import google.generativeai as genai
+from config.settings import get_settings
+
+
+@lru_cache
+def configure_gemini() -> None:
+    """Configure the Gemini SDK with the API key once per process"""
+    genai.configure(api_key=get_settings().GEMINI_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def get_model(name: str) -> genai.GenerativeModel:
+    """Return a shared GenerativeModel handle for the given model name"""
+    configure_gemini()
+    return genai.GenerativeModel(name)
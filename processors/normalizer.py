@@ -1,12 +1,83 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from loguru import logger
 from utils.helpers import clean_text, extract_geo_from_text
 import re
 
+try:
+    import hyperscan  # optional multi-pattern prefilter
+except ImportError:
+    hyperscan = None
+
+# Common political entities in Indore context
+ENTITY_PATTERNS = {
+    "PERSON": [
+        r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)?\b',  # English names
+        r'\b(?:श्री|श्रीमती|डॉ\.?)\s*[\u0900-\u097F\s]+\b'  # Hindi names with titles
+    ],
+    "ORG": [
+        r'\b(?:Nagar Nigam|Collectorate|Police)\b',
+        r'\b(?:नगर निगम|कलेक्ट्रेट|पुलिस)\b'
+    ],
+    "LOC": [
+        r'\bWard\s*\d+\b',
+        r'\bवार्ड\s*\d+\b'
+    ]
+}
+
+# Flattened in scan order: (entity_type, compiled pattern)
+_ENTITY_REGEXES = [
+    (entity_type, re.compile(pattern, re.IGNORECASE | re.UNICODE))
+    for entity_type, pattern_list in ENTITY_PATTERNS.items()
+    for pattern in pattern_list
+]
+
+
+def _build_hyperscan_db():
+    """
+    Compile all entity patterns into one Hyperscan database.
+    It is used only as a prefilter (which patterns occur at all): word
+    boundaries are dropped and PREFILTER mode may over-match, so every hit is
+    confirmed with the exact `re` pattern and results stay identical.
+    """
+    if hyperscan is None:
+        return None
+    expressions = []
+    for _, regex in _ENTITY_REGEXES:
+        pattern = regex.pattern.replace(r'\b', '')
+        pattern = re.sub(r'\\u([0-9A-Fa-f]{4})', r'\\x{\1}', pattern)
+        expressions.append(pattern.encode('utf-8'))
+    flags = (hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_CASELESS
+             | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_PREFILTER)
+    try:
+        db = hyperscan.Database()
+        db.compile(expressions=expressions, ids=list(range(len(expressions))),
+                   elements=len(expressions), flags=[flags] * len(expressions))
+        return db
+    except Exception as e:
+        logger.warning(f"Hyperscan compile failed, using re only: {e}")
+        return None
+
+
+_HS_DB = _build_hyperscan_db()
+
+
+def _candidate_patterns(text: str) -> Optional[set]:
+    """Indices of patterns that may match text, or None to try all of them"""
+    if _HS_DB is None:
+        return None
+    hits = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        hits.add(pattern_id)
+    
+    _HS_DB.scan(text.encode('utf-8'), match_event_handler=on_match)
+    return hits
+
+
 class Normalizer:
     def normalize_source(self, source: Dict) -> Dict:
         """Normalize source data"""
-        logger.debug(f"Normalizing source: {source.get('title', 'Unknown')[:30]}...")
+        logger.debug("Normalizing source: {:.30}...", source.get('title', 'Unknown'))
         
         # Clean title and content
         if 'title' in source:
@@ -34,31 +105,17 @@ class Normalizer:
     def extract_entities(self, text: str) -> List[Dict]:
         """Extract named entities (simple regex-based for MVP)"""
         entities = []
+        _append = entities.append
+        candidates = _candidate_patterns(text)
         
-        # Common political entities in Indore context
-        patterns = {
-            "PERSON": [
-                r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)?\b',  # English names
-                r'\b(?:श्री|श्रीमती|डॉ\.?)\s*[\u0900-\u097F\s]+\b'  # Hindi names with titles
-            ],
-            "ORG": [
-                r'\b(?:Nagar Nigam|Collectorate|Police)\b',
-                r'\b(?:नगर निगम|कलेक्ट्रेट|पुलिस)\b'
-            ],
-            "LOC": [
-                r'\bWard\s*\d+\b',
-                r'\bवार्ड\s*\d+\b'
-            ]
-        }
-        
-        for entity_type, pattern_list in patterns.items():
-            for pattern in pattern_list:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    entities.append({
-                        "type": entity_type,
-                        "text": match.group(0).strip(),
-                        "start": match.start(),
-                        "end": match.end()
-                    })
-        return entities
\ No newline at end of file
+        for idx, (entity_type, regex) in enumerate(_ENTITY_REGEXES):
+            if candidates is not None and idx not in candidates:
+                continue
+            for match in regex.finditer(text):
+                _append({
+                    "type": entity_type,
+                    "text": match.group(0).strip(),
+                    "start": match.start(),
+                    "end": match.end()
+                })
+        return entities
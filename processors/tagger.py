@@ -1,13 +1,12 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from loguru import logger
-import google.generativeai as genai
-from config.settings import settings
+from processors.gemini import get_model
 import json
 
 class Tagger:
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = get_model('gemini-2.0-flash')
+        self.batch_size = 10  # chunks per tagging call
         
         # Tag taxonomy
         self.issue_tags = [
@@ -28,31 +27,65 @@ class Tagger:
     
     def tag_chunk(self, chunk_text: str, source_metadata: Dict) -> Dict:
         """Generate tags for a chunk using Gemini"""
+        return self.tag_chunks_batch([(chunk_text, source_metadata)])[0]
+    
+    def tag_chunks_batch(self, chunks_with_metadata: List[Tuple[str, Dict]]) -> List[Dict]:
+        """
+        Generate tags for several chunks with one Gemini call.
+        If the response can't be parsed or has the wrong number of entries,
+        the batch is bisected and retried; a single chunk that still fails
+        gets the default tags. API, quota and network errors are not retried
+        this way (every half would fail too): the whole batch gets default tags.
+        """
+        if not chunks_with_metadata:
+            return []
         try:
-            prompt = self._create_tagging_prompt(chunk_text, source_metadata)
+            prompt = self._create_tagging_prompt(chunks_with_metadata)
             response = self.model.generate_content(prompt)
-            tags_data = self._parse_llm_response(response.text)
+        except Exception as e:
+            logger.error(f"Error tagging {len(chunks_with_metadata)} chunks: {e}")
+            return [self._get_default_tags() for _ in chunks_with_metadata]
+        
+        try:
+            # response.text also raises ValueError when the output was blocked
+            results = self._parse_llm_response(response.text)
+            
+            if (not isinstance(results, list) or len(results) != len(chunks_with_metadata)
+                    or not all(isinstance(r, dict) for r in results)):
+                raise ValueError(f"expected {len(chunks_with_metadata)} tag objects")
             
-            # Add confidence scores
-            tags_data["confidence"] = self._calculate_confidence(tags_data)
+            for tags_data in results:
+                # Add confidence scores
+                tags_data["confidence"] = self._calculate_confidence(tags_data)
             
-            logger.debug(f"Tagged chunk with {len(tags_data.get('tags', []))} tags")
-            return tags_data
+            logger.debug("Tagged {} chunks in one call", len(results))
+            return results
         
-        except Exception as e:
-            logger.error(f"Error tagging chunk: {e}")
-            return self._get_default_tags()
+        # Malformed output: bad JSON (JSONDecodeError is a ValueError), wrong count or shape
+        except (ValueError, TypeError, AttributeError) as e:
+            if len(chunks_with_metadata) == 1:
+                logger.error(f"Error tagging chunk: {e}")
+                return [self._get_default_tags()]
+            mid = len(chunks_with_metadata) // 2
+            return (self.tag_chunks_batch(chunks_with_metadata[:mid])
+                    + self.tag_chunks_batch(chunks_with_metadata[mid:]))
     
-    def _create_tagging_prompt(self, text: str, metadata: Dict) -> str:
-        """Create prompt for LLM tagging"""
-        return f"""Analyze this text from Indore, Madhya Pradesh political context and extract structured tags.
-
-Text: {text[:1000]}
+    def _create_tagging_prompt(self, chunks_with_metadata: List[Tuple[str, Dict]]) -> str:
+        """Create prompt for LLM tagging of one or more numbered texts"""
+        texts = "\n\n".join(
+            f"""### Text {i}
+{text[:1000]}
 
 Source Type: {metadata.get('source_type', 'unknown')}
-Location: {metadata.get('geo', {}).get('district', 'Indore')}
+Location: {metadata.get('geo', {}).get('district', 'Indore')}"""
+            for i, (text, metadata) in enumerate(chunks_with_metadata, 1)
+        )
+        
+        return f"""Analyze each numbered text below from Indore, Madhya Pradesh political context and extract structured tags.
+
+{texts}
 
-Extract the following as JSON:
+For each text, in the same order, extract the following as JSON:
 {{
     "domain": "political|governance|legal",
     "issues": ["water_supply", "healthcare", etc],
@@ -75,41 +108,41 @@ Available issue tags: {', '.join(self.issue_tags)}
 Available cohort tags: {', '.join(self.cohort_tags)}
 Available frame tags: {', '.join(self.frame_tags)}
 
-Return ONLY valid JSON, no markdown or extra text."""
+Return ONLY a valid JSON array with exactly {len(chunks_with_metadata)} objects, one per text, no markdown or extra text."""
     
-    def _parse_llm_response(self, response_text: str) -> Dict:
-        """Parse LLM JSON response"""
-        try:
-            # Remove markdown code blocks if present
-            response_text = response_text.strip()
-            if response_text.startswith('```'):
-                response_text = response_text.split('```')[1]
-                if response_text.startswith('json'):
-                    response_text = response_text[4:]
-            
-            tags_data = json.loads(response_text)
-            return tags_data
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse LLM response as JSON: {e}")
-            return self._get_default_tags()
+    def _parse_llm_response(self, response_text: str):
+        """Parse LLM JSON response (raises json.JSONDecodeError on invalid JSON)"""
+        # Remove markdown code blocks if present
+        response_text = response_text.strip()
+        if response_text.startswith('```'):
+            response_text = response_text.split('```')[1]
+            if response_text.startswith('json'):
+                response_text = response_text[4:]
+        
+        return json.loads(response_text)
     
     def _calculate_confidence(self, tags_data: Dict) -> float:
         """Calculate overall confidence score"""
-        scores = []
+        total = 0.0
+        count = 0
         
         if 'leadership_polarity' in tags_data:
-            scores.append(tags_data['leadership_polarity'].get('score', 0.5))
+            total += tags_data['leadership_polarity'].get('score', 0.5)
+            count += 1
         
         if 'sentiment' in tags_data:
-            scores.append(tags_data['sentiment'].get('score', 0.5))
+            total += tags_data['sentiment'].get('score', 0.5)
+            count += 1
         
         # More specific tags = higher confidence
         if tags_data.get('issues'):
-            scores.append(0.8)
+            total += 0.8
+            count += 1
         if tags_data.get('cohorts'):
-            scores.append(0.8)
+            total += 0.8
+            count += 1
         
-        return sum(scores) / len(scores) if scores else 0.5
+        return total / count if count else 0.5
     
     def _get_default_tags(self) -> Dict:
         """Return default tags when LLM fails"""
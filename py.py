@@ -1,11 +1,13 @@
 # paste your raw URLs (each on a new line) into urls_raw.txt before running
-with open("urls_raw.txt") as f:
-    urls = [line.strip() for line in f if line.strip()]
+import json
 
-with open("pdf_urls_list.py", "w") as f:
-    f.write("pdf_urls = [\n")
-    for url in urls:
-        f.write(f'    "{url}",\n')
-    f.write("]\n")
+# Stream line by line; json.dumps quotes each URL safely as a string literal
+with open("urls_raw.txt") as fin, open("pdf_urls_list.py", "w") as fout:
+    fout.write("pdf_urls = [\n")
+    for line in fin:
+        url = line.strip()
+        if url:
+            fout.write(f"    {json.dumps(url)},\n")
+    fout.write("]\n")
 
-print("✅ pdf_urls_list.py created successfully!")
\ No newline at end of file
+print("✅ pdf_urls_list.py created successfully!")
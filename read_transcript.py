@@ -1,15 +1,20 @@
 # read_transcript.py
+import sys
 from config.db_config import SessionLocal
 from database.models import Chunk, Source
 
-db = SessionLocal()
-youtube_source = db.query(Source).filter(Source.domain == 'youtube.com').first()
-chunks = db.query(Chunk).filter(Chunk.source_id == youtube_source.id).order_by(Chunk.seq).all()
+with SessionLocal() as db:
+    youtube_source = db.query(Source).filter(Source.domain == 'youtube.com').first()
+    # Stream chunks through a server-side cursor instead of loading them all
+    chunk_texts = (
+        db.query(Chunk.text)
+        .filter(Chunk.source_id == youtube_source.id)
+        .order_by(Chunk.seq)
+        .yield_per(1000)
+    )
 
-print("YOUTUBE VIDEO TRANSCRIPT - INDORE BUILDING COLLAPSE")
-print("=" * 80)
-for i, chunk in enumerate(chunks, 1):
-    print(f"\n--- Chunk {i} ---")
-    print(chunk.text)
-
-db.close() 
\ No newline at end of file
+    out = sys.stdout
+    out.write("YOUTUBE VIDEO TRANSCRIPT - INDORE BUILDING COLLAPSE\n")
+    out.write("=" * 80 + "\n")
+    for i, (text,) in enumerate(chunk_texts, 1):
+        out.write(f"\n--- Chunk {i} ---\n{text}\n")
@@ -1,49 +1,118 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.parser import HTMLParser
 from typing import Dict, List, Optional
 from datetime import datetime
 from abc import ABC, abstractmethod
+import diskcache
+import hashlib
+import os
+import threading
 import time
 from loguru import logger
-from config.settings import settings
+from config.settings import get_settings
 from utils.helpers import clean_text, generate_hash, detect_language, calculate_trust_score
 
 class BaseScraper(ABC):
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': settings.USER_AGENT})
+        settings = get_settings()
         self.delay = settings.SCRAPE_DELAY
         self.max_retries = settings.MAX_RETRIES
+        
+        # Retries (with backoff) are handled by urllib3; the pool allows concurrent fetches
+        retry = Retry(
+            total=self.max_retries - 1,  # MAX_RETRIES counts attempts
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': settings.USER_AGENT})
+        
+        # On-disk page cache so restarts and reruns skip the network
+        self.page_cache = diskcache.Cache(os.path.join(settings.SCRAPE_CACHE_DIR, "pages"))
+        self.page_cache_ttl = settings.PAGE_CACHE_TTL
+        
+        # Per-host politeness: next time a request to each host may start
+        self._host_next_slot: Dict[str, float] = {}
+        self._host_lock = threading.Lock()
+    
+    def _wait_for_host(self, url: str):
+        """
+        Space requests to the same host at least `delay` seconds apart.
+        Only the remaining part of the interval is slept, so the first request
+        to a host (or one after a long gap) goes out immediately.
+        """
+        host = urlparse(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._host_next_slot.get(host, 0.0))
+            self._host_next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
     
-    def fetch_page(self, url: str) -> Optional[str]:
-        """Fetch HTML content from URL with retry logic"""
-        for attempt in range(self.max_retries):
-            try:
-                time.sleep(self.delay)
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                return response.text
-            except Exception as e:
-                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt == self.max_retries - 1:
-                    logger.error(f"Failed to fetch {url} after {self.max_retries} attempts")
-                    return None
-        return None
+    def fetch_page(self, url: str, use_cache: bool = True) -> Optional[str]:
+        """
+        Fetch HTML content from URL (retries are handled by the session adapter).
+        Pages are served from the disk cache for PAGE_CACHE_TTL seconds.
+        Pass use_cache=False for listing/index pages, which must be fresh on
+        every run to pick up new articles and notices.
+        """
+        key = hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+        if use_cache:
+            cached = self.page_cache.get(key)
+            if cached is not None:
+                return cached
+        try:
+            self._wait_for_host(url)
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+            if use_cache:
+                self.page_cache.set(key, response.text, expire=self.page_cache_ttl)
+            return response.text
+        except Exception as e:
+            logger.error(f"Failed to fetch {url}: {e}")
+            return None
     
-    def parse_html(self, html: str) -> BeautifulSoup:
-        """Parse HTML content"""
-        return BeautifulSoup(html, 'html.parser')
+    def parse_html(self, html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        """
+        Parse HTML content (lxml's C parser).
+        Pass a SoupStrainer as parse_only to build only the tags a caller needs.
+        """
+        return BeautifulSoup(html, 'lxml', parse_only=parse_only)
+    
+    def parse_html_fast(self, html: str) -> HTMLParser:
+        """Parse HTML with selectolax for CSS-selector scans that don't need the BS4 tree"""
+        return HTMLParser(html)
     
     @abstractmethod
     def scrape(self) -> List[Dict]:
         """Main scraping method to be implemented by child classes"""
         pass
     
+    def mark_seen(self, url: str):
+        """
+        Called by the pipeline once a source from this scraper is committed.
+        Scrapers that skip already stored URLs before fetching override this.
+        """
+    
     def create_source_dict(self, url: str, title: str, content: str, 
                           source_type: str, domain: str, 
                           published_at: Optional[datetime] = None) -> Dict:
-        """Create standardized source dictionary"""
+        """
+        Create standardized source dictionary.
+        `content` is the extracted text; raw HTML is not kept on the dict,
+        only a short digest of the content for integrity checks.
+        """
         language = detect_language(content[:500])
+        content_hash = generate_hash(content)
         
         return {
             "source_url": url,
@@ -54,7 +123,7 @@ class BaseScraper(ABC):
             "published_at": published_at or datetime.utcnow(),
             "language": language,
             "trust_score": calculate_trust_score(source_type, domain),
-            "raw_html": content,
+            "content_hash": content_hash,
             "parser_version": "v1.0"
         }
     
@@ -2,126 +2,161 @@ from typing import List, Dict
 from loguru import logger
 from scrapers.base_scraper import BaseScraper
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import re
 
 
 class GovernmentScraper(BaseScraper):
-    def __init__(self, max_depth=2, max_urls=100):
+    _FILE_RE = re.compile(r"\.(pdf|docx?|xlsx?)(?:[?#]|$)", re.I)
+    _EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+")
+    _PHONE_RE = re.compile(r"\+?\d[\d\s\-]{7,}\d")
+
+    def __init__(self, max_depth=2, max_urls=100, max_workers=8):
         super().__init__()
         self.base_url = "https://indore.nic.in"
         self.visited = set()
         self.max_depth = max_depth
         self.max_urls = max_urls
+        self.max_workers = max_workers
 
     def scrape(self) -> List[Dict]:
         logger.info("🏛️ Starting Government Portal Scraping")
         sources = []
-        queue = [(f"{self.base_url}/en/", 0)]  # start URL and depth
-        while queue and len(self.visited) < self.max_urls:
-            url, depth = queue.pop(0)
-            if url in self.visited or depth > self.max_depth:
-                continue
-
-            html = self.fetch_page(url)
-            if not html:
-                continue
+        start_url = f"{self.base_url}/en/"
+        queue = deque([(start_url, 0)])  # start URL and depth
+        queued = {start_url}  # dedup at enqueue time so each URL is fetched once
+        in_flight = {}  # future -> (url, depth)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while (queue or in_flight) and len(self.visited) < self.max_urls:
+                # Keep up to max_workers fetches running
+                while (queue and len(in_flight) < self.max_workers
+                       and len(self.visited) + len(in_flight) < self.max_urls):
+                    url, depth = queue.popleft()
+                    # Pages whose links are followed are index pages: always fetch them fresh
+                    use_cache = depth >= self.max_depth
+                    in_flight[executor.submit(self.fetch_page, url, use_cache)] = (url, depth)
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = in_flight.pop(future)
+                    html = future.result()
+                    if not html:
+                        continue
+                    for link in self._process_page(url, depth, html, sources):
+                        # Everything ever queued counts toward max_urls, so stop growing the frontier there
+                        if len(queued) >= self.max_urls:
+                            break
+                        if link not in queued:
+                            queued.add(link)
+                            queue.append((link, depth + 1))
+
+            for future in in_flight:
+                future.cancel()
 
-            soup = self.parse_html(html)
+        logger.info(f"✅ Government scraping complete. Found {len(sources)} items")
+        return sources
 
-            content_div = soup.find("div", class_="content") or soup.find("main")
-            title_tag = soup.find("h1")
-            title_text = (
-                title_tag.get_text(strip=True) if title_tag else "Government Notice"
-            )
-            content_text = (
-                content_div.get_text(separator="\n", strip=True) if content_div else ""
+    def _process_page(self, url, depth, html, sources):
+        """Extract sources from a fetched page and return the links to crawl next"""
+        tree = self.parse_html_fast(html)
+
+        content_div = tree.css_first("div.content") or tree.css_first("main")
+        title_tag = tree.css_first("h1")
+        title_text = (
+            title_tag.text(strip=True) if title_tag else "Government Notice"
+        )
+        content_text = (
+            content_div.text(separator="\n", strip=True) if content_div else ""
+        )
+
+        if len(content_text) > 100:
+            source = self.create_source_dict(
+                url=url,
+                title=title_text,
+                content=content_text,
+                source_type="government",
+                domain="indore.nic.in",
             )
+            source["raw_content"] = content_text
 
-            if len(content_text) > 100:
-                source = self.create_source_dict(
-                    url=url,
-                    title=title_text,
-                    content=html,
-                    source_type="government",
-                    domain="indore.nic.in",
-                )
-                source["raw_content"] = content_text
-
-                # Optional: Add extra metadata without removing existing fields
-                source["metadata"] = {}
-                date_tag = soup.find("time")
-                if date_tag:
-                    source["metadata"]["published_date"] = date_tag.get_text(strip=True)
-
-                sources.append(source)
-                logger.info(f"✅ Scraped: {title_text[:50]}...")
-
-            # Extract PDFs and other files
-            files = self.extract_files(soup, self.base_url)
-            for file_url, file_title, file_type in files:
-                file_source = self.create_source_dict(
-                    url=file_url,
-                    title=file_title or "Government Document",
-                    content=f"File: {file_title}",
-                    source_type="government",
-                    domain="indore.nic.in",
-                )
-                file_source["raw_blob_url"] = file_url
-                file_source["metadata"] = {"file_type": file_type}
-                sources.append(file_source)
-                logger.info(f"📄 Found file: {file_title[:50]}...")
-
-            self.visited.add(url)
-
-            # Queue internal links
-            links = self.get_internal_links(soup, "indore.nic.in")
-            for link in links:
-                if link not in self.visited:
-                    queue.append((link, depth + 1))
+            # Optional: Add extra metadata without removing existing fields
+            source["metadata"] = {}
+            date_tag = tree.css_first("time")
+            if date_tag:
+                source["metadata"]["published_date"] = date_tag.text(strip=True)
 
-        logger.info(f"✅ Government scraping complete. Found {len(sources)} items")
-        return sources
+            sources.append(source)
+            logger.info("✅ Scraped: {:.50}...", title_text)
 
-    def get_internal_links(self, soup, base_domain):
+        # One pass over the anchors: files become sources, pages get crawled
         links = set()
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"]
-            if href.startswith("/") or base_domain in href:
+        for kind, link_url, file_title in self._classify_links(tree, "indore.nic.in"):
+            if kind == "page":
+                links.add(link_url)
+                continue
+            file_url, file_type = link_url, kind
+            file_source = self.create_source_dict(
+                url=file_url,
+                title=file_title,
+                content=f"File: {file_title}",
+                source_type="government",
+                domain="indore.nic.in",
+            )
+            file_source["raw_blob_url"] = file_url
+            file_source["metadata"] = {"file_type": file_type}
+            sources.append(file_source)
+            logger.info("📄 Found file: {:.50}...", file_title)
+
+        self.visited.add(url)
+
+        # Internal links for the next depth level
+        return links if depth < self.max_depth else set()
+
+    def _classify_links(self, tree, base_domain):
+        """
+        Walk the page's anchors once and yield (kind, url, title), where kind
+        is the file extension for downloadable documents or "page" for
+        internal links. Each URL is yielded at most once.
+        """
+        seen = set()
+        for a_tag in tree.css("a[href]"):
+            href = a_tag.attributes["href"] or ""
+            match = self._FILE_RE.search(href)
+            if match:
+                file_url = href if href.startswith("http") else f"{self.base_url}{href}"
+                if file_url not in seen:
+                    seen.add(file_url)
+                    file_title = a_tag.text(strip=True) or "Government Document"
+                    yield match.group(1).lower(), file_url, file_title
+            elif href.startswith("/") or base_domain in href:
                 full_url = href if href.startswith("http") else f"{self.base_url}{href}"
-                links.add(full_url)
-        return links
-
-    def extract_files(self, soup, base_url):
-        file_types = ["pdf", "doc", "docx", "xls", "xlsx"]
-        files = []
-        for ext in file_types:
-            links = soup.find_all("a", href=re.compile(rf"\.{ext}$", re.I))
-            for link in links:
-                file_url = link["href"]
-                if not file_url.startswith("http"):
-                    file_url = f"{base_url}{file_url}"
-                file_title = link.get_text(strip=True) or "Government Document"
-                files.append((file_url, file_title, ext))
-        return files
+                if full_url not in seen:
+                    seen.add(full_url)
+                    yield "page", full_url, None
 
     def extract_contacts(self, content_text):
         contacts = {}
-        emails = re.findall(r"[\w\.-]+@[\w\.-]+", content_text)
+        emails = self._EMAIL_RE.findall(content_text)
         if emails:
             contacts["emails"] = list(set(emails))
-        phones = re.findall(r"\+?\d[\d\s\-]{7,}\d", content_text)
+        phones = self._PHONE_RE.findall(content_text)
         if phones:
             contacts["phone_numbers"] = list(set(phones))
         return contacts
 
-    def extract_tables(self, soup):
+    def extract_tables(self, tree):
         tables_data = []
-        tables = soup.find_all("table")
+        tables = tree.css("table")
         for table in tables:
-            headers = [th.get_text(strip=True) for th in table.find_all("th")]
+            headers = [th.text(strip=True) for th in table.css("th")]
             rows_data = []
-            for tr in table.find_all("tr"):
-                cells = [td.get_text(strip=True) for td in tr.find_all("td")]
+            for tr in table.css("tr"):
+                cells = [td.text(strip=True) for td in tr.css("td")]
                 if cells:
                     row_dict = dict(zip(headers, cells)) if headers else {"row": cells}
                     rows_data.append(row_dict)
@@ -129,17 +164,17 @@ class GovernmentScraper(BaseScraper):
                 tables_data.append(rows_data)
         return tables_data
 
-    def extract_images(self, soup):
+    def extract_images(self, tree):
         images = []
-        for img in soup.find_all("img", src=True):
-            img_url = img["src"]
+        for img in tree.css("img[src]"):
+            img_url = img.attributes["src"] or ""
             if not img_url.startswith("http"):
                 img_url = f"{self.base_url}{img_url}"
             images.append(img_url)
         return images
 
-    def extract_breadcrumbs(self, soup):
+    def extract_breadcrumbs(self, tree):
         breadcrumbs = []
-        for bc in soup.select("nav.breadcrumb a"):
-            breadcrumbs.append(bc.get_text(strip=True))
+        for bc in tree.css("nav.breadcrumb a"):
+            breadcrumbs.append(bc.text(strip=True))
         return breadcrumbs
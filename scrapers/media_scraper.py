@@ -1,70 +1,124 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from loguru import logger
 from scrapers.base_scraper import BaseScraper
 from datetime import datetime
 import re
-from urllib.parse import urljoin
+from bs4 import SoupStrainer
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from config.settings import get_settings
+import diskcache
+import os
+from types import MappingProxyType
+
+# Compiled once; these run for every listing and article page
+_ARTICLE_CLASS_RE = re.compile(r'story|article|news|card')
+_NEXT_LINK_RE = re.compile(r'next|older|>', re.I)
+
+# Listing pages only need article cards and links (skips script/style/etc. subtrees)
+_LISTING_STRAINER = SoupStrainer(['article', 'div', 'a'])
+
+# Article body containers: any div whose class contains story/article/content
+_CONTENT_SELECTOR = 'div[class*="story"], div[class*="article"], div[class*="content"]'
+
+# Every element the article metadata is read from, matched in one pass
+_ARTICLE_META_SELECTOR = (
+    'time, meta[property="article:published_time"], meta[name="pubdate"], '
+    'meta[name="author"], span[class*="author"], img[src], iframe[src], '
+    'a.category, span.category, div.tags a'
+)
+
+# hrefs in article cards that are never articles (taxonomy, share and pseudo links)
+_NON_ARTICLE_URL_PARTS = ('/tag/', '/tags/', '/author/', '/category/', '/share/', 'mailto:', 'javascript:', 'whatsapp:')
+
+# Site configs are read-only; built once at import rather than per instance
+MEDIA_SOURCES = MappingProxyType({
+    "dainik_bhaskar": MappingProxyType({
+        "url": "https://www.bhaskar.com/local/mp/indore/",
+        "domain": "bhaskar.com",
+        "selectors": MappingProxyType({
+            "articles": "div._c3w6",
+            "title": "h3, h2",
+            "link": "a"
+        }),
+    }),
+    "indian_express": MappingProxyType({
+        "url": "https://indianexpress.com/about/indore/",
+        "domain": "indianexpress.com",
+        "selectors": MappingProxyType({
+            "articles": "div.articles",
+            "title": "h3, h2",
+            "link": "a"
+        }),
+    }),
+    "free_press": MappingProxyType({
+        "url": "https://www.freepressjournal.in/indore",
+        "domain": "freepressjournal.in",
+        "selectors": MappingProxyType({
+            "articles": "div.story-box, article",
+            "title": "h2, h3",
+            "link": "a"
+        }),
+    }),
+    "times_of_india": MappingProxyType({
+        "url": "https://timesofindia.indiatimes.com/topic/indore/news",
+        "domain": "timesofindia.indiatimes.com",
+        "selectors": MappingProxyType({
+            "articles": "div.uwU81",
+            "title": "span",
+            "link": "a"
+        }),
+    }),
+    "india_today": MappingProxyType({
+        "url": "https://www.indiatoday.in/cities/indore-news",
+        "domain": "indiatoday.in",
+        "selectors": MappingProxyType({
+            "articles": "div.story-card, article",
+            "title": "h2, h3",
+            "link": "a"
+        }),
+    }),
+})
+
+def _is_tracking_pixel(attrs: Dict) -> bool:
+    """True for images declared smaller than 5x5 (1x1 beacons and spacers)"""
+    try:
+        return int(attrs.get('width') or 99) < 5 and int(attrs.get('height') or 99) < 5
+    except ValueError:
+        return False
+
+
+def _is_article_candidate(url: str, domain: str) -> bool:
+    """Cheap check run before fetching: on the site's own host and not a taxonomy/share link"""
+    if any(part in url for part in _NON_ARTICLE_URL_PARTS):
+        return False
+    host = urlsplit(url).hostname or ''
+    return host == domain or host.endswith('.' + domain)
+
 
 class MediaScraper(BaseScraper):
-    def __init__(self):
+    def __init__(self, max_workers=8):
         super().__init__()
-        self.media_sources = {
-            "dainik_bhaskar": {
-                "url": "https://www.bhaskar.com/local/mp/indore/",
-                "domain": "bhaskar.com",
-                "selectors": {
-                    "articles": "div._c3w6",
-                    "title": "h3, h2",
-                    "link": "a"
-                }
-            },
-            "indian_express": {
-                "url": "https://indianexpress.com/about/indore/",
-                "domain": "indianexpress.com",
-                "selectors": {
-                    "articles": "div.articles",
-                    "title": "h3, h2",
-                    "link": "a"
-                }
-            },
-            "free_press": {
-                "url": "https://www.freepressjournal.in/indore",
-                "domain": "freepressjournal.in",
-                "selectors": {
-                    "articles": "div.story-box, article",
-                    "title": "h2, h3",
-                    "link": "a"
-                }
-            },
-            "times_of_india": {
-                "url": "https://timesofindia.indiatimes.com/topic/indore/news",
-                "domain": "timesofindia.indiatimes.com",
-                "selectors": {
-                    "articles": "div.uwU81",
-                    "title": "span",
-                    "link": "a"
-                }
-            },
-            "india_today": {
-                "url": "https://www.indiatoday.in/cities/indore-news",
-                "domain": "indiatoday.in",
-                "selectors": {
-                    "articles": "div.story-card, article",
-                    "title": "h2, h3",
-                    "link": "a"
-                }
-            }
-        }
+        self.max_workers = max_workers  # concurrent article fetches per site
+        # Article URLs scraped in previous runs, persisted so reruns skip them
+        self.seen_articles = diskcache.Cache(
+            os.path.join(get_settings().SCRAPE_CACHE_DIR, "seen_articles")
+        )
+        self.media_sources = MEDIA_SOURCES
     
     def scrape(self) -> List[Dict]:
-        """Scrape all media sources"""
+        """Scrape all media sources (each site on its own worker)"""
         logger.info("📰 Starting Media Scraping")
         all_sources = []
         
-        for source_name, config in self.media_sources.items():
-            logger.info(f"Scraping {source_name}...")
-            sources = self.scrape_media_source(source_name, config)
-            all_sources.extend(sources)
+        with ThreadPoolExecutor(max_workers=len(self.media_sources)) as executor:
+            futures = {}
+            for source_name, config in self.media_sources.items():
+                logger.info(f"Scraping {source_name}...")
+                futures[source_name] = executor.submit(self.scrape_media_source, source_name, config)
+            for source_name, future in futures.items():
+                all_sources.extend(future.result())
         
         logger.info(f"✅ Media scraping complete. Found {len(all_sources)} articles")
         return all_sources
@@ -73,129 +127,161 @@ class MediaScraper(BaseScraper):
         """Scrape a single media source"""
         sources = []
         visited_articles = set()
-        pages_to_scrape = [config["url"]]
+        pages_to_scrape = deque([config["url"]])
+        queued_pages = {config["url"]}  # O(1) "already queued" check
         
         while pages_to_scrape: 
-            page_url = pages_to_scrape.pop(0)
-            html = self.fetch_page(page_url)
+            page_url = pages_to_scrape.popleft()
+            html = self.fetch_page(page_url, use_cache=False)  # listing/pagination: always fresh
             if not html:
                 continue
             
-            soup = self.parse_html(html)
+            soup = self.parse_html(html, parse_only=_LISTING_STRAINER)
             
             # Find articles (try multiple generic selectors)
-            articles = soup.find_all(['article', 'div'], class_=re.compile(r'story|article|news|card'))[:15]
+            articles = soup.find_all(['article', 'div'], class_=_ARTICLE_CLASS_RE)[:15]
 
+            # Collect (title, url) for new articles, then fetch them concurrently
+            candidates = []
             for article in articles:
-                try:
-                    # Extract title
-                    title_elem = article.find(['h1', 'h2', 'h3', 'h4'])
-                    if not title_elem:
-                        continue
-                    title = title_elem.get_text(strip=True)
-
-                    # Extract link
-                    link_elem = article.find('a', href=True)
-                    if not link_elem:
-                        continue
-                    article_url = link_elem['href']
-                    if not article_url.startswith('http'):
-                        article_url = urljoin(config["url"], article_url)
-                    
-                    if article_url in visited_articles:
-                        continue
-                    visited_articles.add(article_url)
-
-                    # Fetch full article page
-                    article_html = self.fetch_page(article_url)
-                    if not article_html:
-                        continue
+                # Extract title
+                title_elem = article.find(['h1', 'h2', 'h3', 'h4'])
+                if not title_elem:
+                    continue
+                title = title_elem.get_text(strip=True)
 
-                    article_soup = self.parse_html(article_html)
-                    content_div = (article_soup.find('div', class_=re.compile(r'story|article|content')) or
-                                   article_soup.find('article'))
-                    if not content_div:
-                        continue
+                # Extract link
+                link_elem = article.find('a', href=True)
+                if not link_elem:
+                    continue
+                article_url = link_elem['href'].split('#', 1)[0]
+                if not article_url.startswith('http'):
+                    article_url = urljoin(config["url"], article_url)
+                
+                # Skip links that can't be articles without spending a request on them
+                if not _is_article_candidate(article_url, config["domain"]):
+                    continue
+                if article_url in visited_articles or article_url in self.seen_articles:
+                    continue
+                visited_articles.add(article_url)
+                candidates.append((title, article_url))
 
-                    content = content_div.get_text(separator='\n', strip=True)
-                    if len(content) < 50:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pages = executor.map(self.fetch_page, [url for _, url in candidates])
+                for (title, article_url), article_html in zip(candidates, pages):
+                    try:
+                        source = self._build_article_source(title, article_url, article_html, config)
+                        if source:
+                            sources.append(source)
+                            logger.info("✅ Scraped: {:.50}...", title)
+                    
+                    except Exception as e:
+                        logger.warning(f"Error scraping article from {source_name}: {e}")
                         continue
 
-                    # Create source dict with existing structure
-                    source = self.create_source_dict(
-                        url=article_url,
-                        title=title,
-                        content=article_html,
-                        source_type="media",
-                        domain=config["domain"]
-                    )
-                    source["raw_content"] = content
-
-                    # Enhanced metadata
-                    source["metadata"] = {
-                        "published_date": self.extract_published_date(article_soup),
-                        "author": self.extract_author(article_soup),
-                        "images": self.extract_images(article_soup, config["url"]),
-                        "videos": self.extract_videos(article_soup),
-                        "categories": self.extract_categories(article_soup),
-                    }
-
-                    sources.append(source)
-                    logger.info(f"✅ Scraped: {title[:50]}...")
-
-                except Exception as e:
-                    logger.warning(f"Error scraping article from {source_name}: {e}")
-                    continue
-
             # Optional: Add next page links for pagination
             next_links = self.extract_pagination_links(soup, config["url"])
             for link in next_links:
-                if link not in pages_to_scrape:
+                if link not in queued_pages:
+                    queued_pages.add(link)
                     pages_to_scrape.append(link)
 
         return sources
     
-    def extract_published_date(self, soup):
-        time_tag = soup.find('time')
-        if time_tag:
-            return time_tag.get_text(strip=True)
-        # Check meta tags
-        meta_time = soup.find('meta', attrs={'property':'article:published_time'}) or soup.find('meta', attrs={'name':'pubdate'})
-        if meta_time and meta_time.get('content'):
-            return meta_time['content']
-        return None
-    
-    def extract_author(self, soup):
-        author_tag = soup.find('meta', attrs={'name':'author'}) or soup.find('span', class_=re.compile(r'author'))
-        if author_tag:
-            return author_tag.get('content') or author_tag.get_text(strip=True)
-        return None
-    
-    def extract_images(self, soup, base_url):
-        images = []
-        for img in soup.find_all('img', src=True):
-            img_url = img['src']
-            if not img_url.startswith('http'):
-                img_url = urljoin(base_url, img_url)
-            images.append(img_url)
-        return images
+    def _build_article_source(self, title: str, article_url: str,
+                              article_html: Optional[str], config: Dict) -> Optional[Dict]:
+        """Turn a fetched article page into a source dict (None if unusable)"""
+        if not article_html:
+            return None
+
+        # Article pages need no regex matching, so use selectolax instead of BS4
+        tree = self.parse_html_fast(article_html)
+        content_div = tree.css_first(_CONTENT_SELECTOR) or tree.css_first('article')
+        if not content_div:
+            return None
+
+        content = content_div.text(separator='\n', strip=True)
+        if len(content) < 50:
+            return None
+
+        # Create source dict with existing structure
+        source = self.create_source_dict(
+            url=article_url,
+            title=title,
+            content=content,
+            source_type="media",
+            domain=config["domain"]
+        )
+        source["raw_content"] = content
+
+        # Enhanced metadata
+        source["metadata"] = self.extract_article_metadata(tree, config["url"])
+        return source
     
-    def extract_videos(self, soup):
-        videos = []
-        for iframe in soup.find_all('iframe', src=True):
-            if 'youtube' in iframe['src'] or 'vimeo' in iframe['src']:
-                videos.append(iframe['src'])
-        return videos
+    def extract_article_metadata(self, tree, base_url) -> Dict:
+        """
+        Collect published date, author, images, videos and categories in a
+        single selector pass over the article, routing each match by tag.
+        """
+        base = urlsplit(base_url)  # parsed once for all images
+        time_text = None
+        meta_published = meta_pubdate = meta_author = span_author = None
+        images, videos, categories = [], [], set()
+        
+        for node in tree.css(_ARTICLE_META_SELECTOR):
+            tag = node.tag
+            attrs = node.attributes
+            if tag == 'time':
+                if time_text is None:
+                    time_text = node.text(strip=True)
+            elif tag == 'meta':
+                content = attrs.get('content')
+                if attrs.get('property') == 'article:published_time' and meta_published is None:
+                    meta_published = content
+                elif attrs.get('name') == 'pubdate' and meta_pubdate is None:
+                    meta_pubdate = content
+                elif attrs.get('name') == 'author' and meta_author is None:
+                    meta_author = content
+            elif tag == 'img':
+                src = attrs.get('src') or ''
+                if not src or src.startswith('data:') or _is_tracking_pixel(attrs):
+                    continue
+                if src.startswith('http'):
+                    images.append(src)
+                elif src.startswith('//'):
+                    images.append(f"{base.scheme}:{src}")
+                elif src.startswith('/'):
+                    images.append(f"{base.scheme}://{base.netloc}{src}")
+                else:
+                    images.append(urljoin(base_url, src))
+            elif tag == 'iframe':
+                src = attrs.get('src') or ''
+                if 'youtube' in src or 'vimeo' in src:
+                    videos.append(src)
+            else:  # a / span: category links or author span
+                classes = attrs.get('class') or ''
+                if tag == 'a' or 'category' in classes.split():
+                    categories.add(node.text(strip=True))
+                if tag == 'span' and 'author' in classes and span_author is None:
+                    span_author = node.text(strip=True)
+        
+        # Same precedence as before: <time>, then published_time, then pubdate meta
+        published_date = time_text if time_text is not None else (meta_published or meta_pubdate)
+        return {
+            "published_date": published_date,
+            "author": meta_author or span_author,
+            "images": images,
+            "videos": videos,
+            "categories": list(categories),
+        }
     
-    def extract_categories(self, soup):
-        categories = []
-        for cat in soup.select('a.category, span.category, div.tags a'):
-            categories.append(cat.get_text(strip=True))
-        return list(set(categories))
+    def mark_seen(self, url: str):
+        """Remember an article URL once its source is stored, so reruns don't fetch it"""
+        self.seen_articles.set(url, True)
     
     def extract_pagination_links(self, soup, base_url):
         links = []
-        for a in soup.find_all('a', href=True, string=re.compile(r'next|older|>', re.I)):
+        for a in soup.find_all('a', href=True, string=_NEXT_LINK_RE):
             href = a['href']
             if not href.startswith('http'):
                 href = urljoin(base_url, href)
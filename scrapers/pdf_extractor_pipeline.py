@@ -1,15 +1,24 @@
 # pdf_pipeline.py
 
-from sqlalchemy import select
+from sqlalchemy import select, insert, func
 from config.db_config import get_db
 from database.models import Source, PDFExtraction
 from scrapers.pdf_scraper import SimplePDFExtractor
 from loguru import logger
+from multiprocessing import Pool, util
 import os
 
+SAVE_BATCH_SIZE = 50
+
+# Set in each pool worker by _init_worker
+_worker_extractor = None
+
 
 def fetch_pdf_sources(db):
-    """Fetch all sources that are PDFs."""
+    """
+    Fetch all sources that are PDFs.
+    The predicate must match idx_source_pdf's WHERE clause for the partial index to be used.
+    """
     stmt = select(
         Source.id,
         Source.source_url,
@@ -18,7 +27,7 @@ def fetch_pdf_sources(db):
         Source.source_type,
         Source.language,
         Source.geo,
-    ).where(Source.source_url.ilike("%.pdf"))
+    ).where(func.lower(Source.source_url).like("%.pdf"))
     return db.execute(stmt).all()
 
 
@@ -28,87 +37,110 @@ def extract_text_from_pdf(extractor: SimplePDFExtractor, pdf_url: str) -> str:
     Returns the extracted text content as a string.
     """
     try:
-        # Temporarily extract one file and get its output path
-        pdf_filename = pdf_url.split("/")[-1].replace(".pdf", "")
-        output_path = extractor.output_dir / f"temp_{pdf_filename}.txt"
-
-        # Run internal process manually (not the bulk method)
-        extractor.extract_single_pdf(pdf_url, 1)
-
-        # Find the corresponding output file (the last generated .txt)
-        files = sorted(
-            extractor.output_dir.glob("*.txt"), key=os.path.getmtime, reverse=True
-        )
-        if not files:
-            return ""
-
-        latest_file = files[0]
-        with open(latest_file, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Clean up temporary .txt if needed
-        try:
-            os.remove(latest_file)
-        except:
-            pass
-
-        return content
+        return extractor.extract_single_pdf_to_string(pdf_url)
 
     except Exception as e:
         logger.error(f"Extraction failed for {pdf_url}: {e}")
         return ""
 
 
-def process_pdfs():
-    """Main pipeline for PDF extraction and database storage."""
-    extractor = SimplePDFExtractor(output_dir="pdf_extracts")
-
-    with next(get_db()) as db:
-        pdf_sources = fetch_pdf_sources(db)
-        logger.info(f"Found {len(pdf_sources)} PDF sources in database.")
-
-        for (
-            source_id,
-            source_url,
-            title,
-            domain,
-            source_type,
-            language,
-            geo,
-        ) in pdf_sources:
+def _init_worker():
+    """Pool initializer: one extractor (temp dir + HTTP session) per worker process"""
+    global _worker_extractor
+    _worker_extractor = SimplePDFExtractor(output_dir="pdf_extracts")
+    # Remove the temp dir when the worker exits cleanly (pool.close() + join())
+    util.Finalize(_worker_extractor, _worker_extractor.cleanup, exitpriority=10)
 
-            logger.info(f"Processing {source_url}")
 
-            # Step 1: Extract text
-            extracted_text = extract_text_from_pdf(extractor, source_url)
+def _extract_worker(item):
+    """Pool entry point: (index, pdf_url) -> (index, text), so unordered results can be matched back"""
+    idx, pdf_url = item
+    return idx, extract_text_from_pdf(_worker_extractor, pdf_url)
 
-            if not extracted_text.strip():
-                logger.warning(f"No text extracted from {source_url}")
-                continue
 
-            # Step 2: Store result
+def save_extractions(db, rows):
+    """
+    Insert a batch of PDFExtraction rows in one statement and commit once.
+    If the batch fails, retry row by row so one bad record doesn't lose the rest.
+    """
+    if not rows:
+        return
+    try:
+        db.execute(insert(PDFExtraction), rows)
+        db.commit()
+        logger.success(f"✅ Stored {len(rows)} extractions")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Batch insert failed ({e}); retrying row by row")
+        for row in rows:
             try:
-                record = PDFExtraction(
-                    source_id=source_id,
-                    source_url=source_url,
-                    title=title,
-                    domain=domain,
-                    source_type=source_type,
-                    language=language,
-                    geo=geo,
-                    extracted_text=extracted_text,
-                )
-                db.add(record)
+                db.execute(insert(PDFExtraction), [row])
                 db.commit()
-                logger.success(f"✅ Stored extraction for {source_url}")
-
+                logger.success(f"✅ Stored extraction for {row['source_url']}")
             except Exception as e:
                 db.rollback()
-                logger.error(f"DB insert failed for {source_url}: {e}")
+                logger.error(f"DB insert failed for {row['source_url']}: {e}")
 
-    extractor.cleanup()
-    logger.info("Pipeline completed successfully.")
 
+def process_pdfs():
+    """
+    Main pipeline for PDF extraction and database storage.
+    Extraction (CPU-bound) runs on a process pool; DB writes stay in this process
+    and overlap with extraction, since results are consumed as soon as any worker finishes.
+    """
+    with next(get_db()) as db:
+        pdf_sources = fetch_pdf_sources(db)
+        logger.info(f"Found {len(pdf_sources)} PDF sources in database.")
+
+        pool = Pool(processes=os.cpu_count(), initializer=_init_worker)
+        try:
+            # Step 1: Extract text (results arrive in completion order)
+            results = pool.imap_unordered(
+                _extract_worker,
+                [(i, row.source_url) for i, row in enumerate(pdf_sources)],
+                chunksize=2,
+            )
+
+            pending = []
+            for idx, extracted_text in results:
+                (
+                    source_id,
+                    source_url,
+                    title,
+                    domain,
+                    source_type,
+                    language,
+                    geo,
+                ) = pdf_sources[idx]
+
+                logger.info(f"Processing {source_url}")
+
+                if not extracted_text.strip():
+                    logger.warning(f"No text extracted from {source_url}")
+                    continue
+
+                # Step 2: Queue result; stored in batches of SAVE_BATCH_SIZE
+                pending.append({
+                    "source_id": source_id,
+                    "source_url": source_url,
+                    "title": title,
+                    "domain": domain,
+                    "source_type": source_type,
+                    "language": language,
+                    "geo": geo,
+                    "extracted_text": extracted_text,
+                })
+                if len(pending) >= SAVE_BATCH_SIZE:
+                    save_extractions(db, pending)
+                    pending = []
+
+            save_extractions(db, pending)
+        finally:
+            # close()+join() rather than terminate() so worker finalizers (temp dir cleanup) run
+            pool.close()
+            pool.join()
+
+    logger.info("Pipeline completed successfully.")
 
 if __name__ == "__main__":
     process_pdfs()
@@ -20,6 +20,8 @@ class SimplePDFExtractor:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.min_text_length = 50
+        # One keep-alive session so PDFs from the same host reuse connections
+        self.session = requests.Session()
 
     def extract_pdfs(self, pdf_urls: List[str]):
         logger.info(f"Starting extraction for {len(pdf_urls)} PDFs")
@@ -36,7 +38,18 @@ class SimplePDFExtractor:
         logger.info(f"Extraction complete. Files saved in {self.output_dir}")
 
     def extract_single_pdf(self, pdf_url: str, pdf_number: int):
-        response = requests.get(pdf_url, timeout=30)
+        pdf_filename = pdf_url.split("/")[-1].replace(".pdf", "")
+        output_filename = f"{pdf_number:03d}_{pdf_filename}.txt"
+        output_path = self.output_dir / output_filename
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(self.extract_single_pdf_to_string(pdf_url))
+
+        logger.info(f"Saved to {output_filename}")
+
+    def extract_single_pdf_to_string(self, pdf_url: str) -> str:
+        """Download and extract one PDF, returning the text without writing an output file"""
+        response = self.session.get(pdf_url, timeout=30)
         response.raise_for_status()
 
         pdf_filename = pdf_url.split("/")[-1].replace(".pdf", "")
@@ -49,23 +62,20 @@ class SimplePDFExtractor:
             f"Downloaded {pdf_filename} ({len(response.content) / 1024:.1f} KB)"
         )
 
-        extracted_content = self.process_pdf(temp_pdf_path, pdf_url)
-
-        output_filename = f"{pdf_number:03d}_{pdf_filename}.txt"
-        output_path = self.output_dir / output_filename
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(f"PDF URL: {pdf_url}\n")
-            f.write(f"Filename: {pdf_filename}\n")
-            f.write("=" * 80 + "\n\n")
-            f.write(extracted_content)
-
-        logger.info(f"Saved to {output_filename}")
-
         try:
-            os.remove(temp_pdf_path)
-        except:
-            pass
+            extracted_content = self.process_pdf(temp_pdf_path, pdf_url)
+        finally:
+            try:
+                os.remove(temp_pdf_path)
+            except:
+                pass
+
+        return (
+            f"PDF URL: {pdf_url}\n"
+            f"Filename: {pdf_filename}\n"
+            + "=" * 80 + "\n\n"
+            + extracted_content
+        )
 
     def process_pdf(self, pdf_path: str, source_url: str) -> str:
         doc = fitz.open(pdf_path)
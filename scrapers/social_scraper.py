@@ -17,19 +17,19 @@ class SocialScraper(BaseScraper):
         # For MVP, we'll implement a placeholder that can be extended
         
         url = f"https://x.com/{self.twitter_handle}"
-        html = self.fetch_page(url)
+        html = self.fetch_page(url, use_cache=False)  # profile feed changes between runs
         
         if html:
-            soup = self.parse_html(html)
+            tree = self.parse_html_fast(html)
             
             # Extract visible text (limited without API)
-            text_content = soup.get_text(separator='\n', strip=True)
+            text_content = tree.text(separator='\n', strip=True)
             
             if len(text_content) > 100:
                 source = self.create_source_dict(
                     url=url,
                     title=f"Twitter Feed: @{self.twitter_handle}",
-                    content=html,
+                    content=text_content,
                     source_type="social",
                     domain="x.com"
                 )
@@ -1,24 +1,32 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from loguru import logger
 from scrapers.base_scraper import BaseScraper
 from datetime import datetime
 import yt_dlp
 import re
 import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.settings import get_settings
+import diskcache
+import os
+import traceback
+
+_VIDEO_ID_RE = re.compile(r'(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})')
 
 class YouTubeScraper(BaseScraper):
-    def __init__(self):
+    def __init__(self, max_workers=8):
         super().__init__()
+        self.max_workers = max_workers  # concurrent videos (metadata + subtitle fetch are I/O bound)
         self.video_urls = [
             "https://www.youtube.com/watch?v=BkJTFxPL2d4",
         ]
-    
-    def scrape(self) -> List[Dict]:
-        """Scrape YouTube videos with full transcripts"""
-        logger.info("Starting YouTube Scraping")
-        sources = []
-        
-        ydl_opts = {
+        # Extracted video data from previous runs, keyed by video id
+        self.video_cache = diskcache.Cache(
+            os.path.join(get_settings().SCRAPE_CACHE_DIR, "youtube")
+        )
+        # Shared options; each worker opens its own YoutubeDL (instances aren't thread-safe)
+        self.ydl_opts = {
             'skip_download': True,
             'writesubtitles': True,
             'writeautomaticsub': True,
@@ -26,111 +34,150 @@ class YouTubeScraper(BaseScraper):
             'subtitlesformat': 'json3',
             'quiet': True,
             'no_warnings': True,
+            # Only title/description/duration/captions are used: skip comments,
+            # DASH/HLS manifests and the extra player-client round-trips
+            'getcomments': False,
+            'youtube_include_dash_manifest': False,
+            'youtube_include_hls_manifest': False,
+            'extractor_args': {'youtube': {'player_client': ['web']}},
         }
+    
+    def scrape(self) -> List[Dict]:
+        """Scrape YouTube videos with full transcripts (one video per worker)"""
+        logger.info("Starting YouTube Scraping")
+        sources = []
         
-        for video_url in self.video_urls:
-            try:
-                video_id = self.extract_video_id(video_url)
-                if not video_id:
-                    continue
-                
+        if self.video_urls:
+            workers = min(self.max_workers, len(self.video_urls))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._scrape_one, url) for url in self.video_urls]
+                for future in as_completed(futures):
+                    source = future.result()
+                    if source:
+                        sources.append(source)
+        
+        logger.info(f"YouTube scraping complete. Found {len(sources)} videos")
+        return sources
+    
+    def _scrape_one(self, video_url: str) -> Optional[Dict]:
+        """Scrape a single video; returns None if it can't be scraped"""
+        try:
+            video_id = self.extract_video_id(video_url)
+            if not video_id:
+                return None
+            
+            # Metadata + transcript are cached per video for PAGE_CACHE_TTL seconds
+            video = self.video_cache.get(video_id)
+            if video is None:
                 logger.info(f"Processing video: {video_id}")
+                video = self._fetch_video(video_url, video_id)
+                self.video_cache.set(video_id, video, expire=self.page_cache_ttl)
+            else:
+                logger.info(f"Using cached video: {video_id}")
+            
+            title = video["title"]
+            description = video["description"]
+            transcript_text = video["transcript_text"]
+            subtitle_source = video["subtitle_source"]
+            
+            # Combine all content
+            full_content = f"{title}\n\n{description}\n\n{transcript_text}"
+            
+            source = self.create_source_dict(
+                url=video_url,
+                title=title,
+                content=full_content,
+                source_type="social",
+                domain="youtube.com"
+            )
+            source["raw_content"] = full_content
+            source["extra_metadata"] = {
+                "video_id": video_id,
+                "duration_seconds": video["duration"],
+                "subtitle_source": subtitle_source,
+                "transcript_length": len(transcript_text),
+                "platform": "youtube"
+            }
+            
+            logger.info(f"Scraped: {title[:50]}... ({subtitle_source})")
+            return source
+        
+        except Exception as e:
+            logger.error(f"Error scraping YouTube video {video_url}: {e}")
+            logger.debug(traceback.format_exc())
+            return None
+    
+    def _fetch_video(self, video_url: str, video_id: str) -> Dict:
+        """Fetch metadata with yt_dlp and the best available transcript (hi, then en)"""
+        with yt_dlp.YoutubeDL(dict(self.ydl_opts)) as ydl:
+            # process=False returns the extractor's raw InfoDict (title, description,
+            # duration, subtitles, automatic_captions) and skips format selection
+            # and subtitle/thumbnail post-processing
+            info = ydl.extract_info(video_url, download=False, process=False)
+            # Format/thumbnail lists are the bulk of the InfoDict and never read
+            info.pop('formats', None)
+            info.pop('thumbnails', None)
+            
+            title = info.get('title', f'YouTube Video {video_id}')
+            description = info.get('description', '')
+            duration = info.get('duration', 0)
+            
+            # Extract subtitles/captions
+            subtitles = info.get('subtitles', {})
+            automatic_captions = info.get('automatic_captions', {})
+            
+            transcript_text = ""
+            subtitle_source = None
+            
+            # Try Hindi first, then English
+            for lang in ['hi', 'en']:
+                caption_data = None
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(video_url, download=False)
-                    
-                    title = info.get('title', f'YouTube Video {video_id}')
-                    description = info.get('description', '')
-                    duration = info.get('duration', 0)
-                    
-                    # Extract subtitles/captions
-                    subtitles = info.get('subtitles', {})
-                    automatic_captions = info.get('automatic_captions', {})
-                    
-                    transcript_text = ""
-                    subtitle_source = None
-                    
-                    # Try Hindi first, then English
-                    for lang in ['hi', 'en']:
-                        caption_data = None
-                        
-                        if lang in subtitles and subtitles[lang]:
-                            caption_data = subtitles[lang]
-                            subtitle_source = f"{lang} (manual)"
-                        elif lang in automatic_captions and automatic_captions[lang]:
-                            caption_data = automatic_captions[lang]
-                            subtitle_source = f"{lang} (auto-generated)"
-                        
-                        if caption_data:
-                            # Get json3 format subtitle
-                            json3_subtitle = None
-                            for fmt in caption_data:
-                                if fmt.get('ext') == 'json3':
-                                    json3_subtitle = fmt
-                                    break
-                            
-                            if json3_subtitle and 'url' in json3_subtitle:
-                                # Download and parse the subtitle
-                                import requests
-                                response = requests.get(json3_subtitle['url'])
-                                if response.status_code == 200:
-                                    subtitle_json = response.json()
-                                    # Extract text from events
-                                    events = subtitle_json.get('events', [])
-                                    transcript_parts = []
-                                    for event in events:
-                                        if 'segs' in event:
-                                            for seg in event['segs']:
-                                                if 'utf8' in seg:
-                                                    transcript_parts.append(seg['utf8'])
-                                    transcript_text = ' '.join(transcript_parts)
-                                    logger.info(f"Extracted transcript: {len(transcript_text)} chars")
-                                    break
-                    
-                    # Fallback to description if no transcript
-                    if not transcript_text:
-                        logger.warning(f"No subtitles found for {video_id}, using description")
-                        transcript_text = description
-                        subtitle_source = "description only"
-                    
-                    # Combine all content
-                    full_content = f"{title}\n\n{description}\n\n{transcript_text}"
-                    
-                    source = self.create_source_dict(
-                        url=video_url,
-                        title=title,
-                        content=full_content,
-                        source_type="social",
-                        domain="youtube.com"
-                    )
-                    source["raw_content"] = full_content
-                    source["extra_metadata"] = {
-                        "video_id": video_id,
-                        "duration_seconds": duration,
-                        "subtitle_source": subtitle_source,
-                        "transcript_length": len(transcript_text),
-                        "platform": "youtube"
-                    }
+                if lang in subtitles and subtitles[lang]:
+                    caption_data = subtitles[lang]
+                    subtitle_source = f"{lang} (manual)"
+                elif lang in automatic_captions and automatic_captions[lang]:
+                    caption_data = automatic_captions[lang]
+                    subtitle_source = f"{lang} (auto-generated)"
+                
+                if caption_data:
+                    # Get json3 format subtitle
+                    json3_subtitle = None
+                    for fmt in caption_data:
+                        if fmt.get('ext') == 'json3':
+                            json3_subtitle = fmt
+                            break
                     
-                    sources.append(source)
-                    logger.info(f"Scraped: {title[:50]}... ({subtitle_source})")
+                    if json3_subtitle and 'url' in json3_subtitle:
+                        # Download and parse the subtitle (pooled keep-alive session)
+                        response = self.session.get(json3_subtitle['url'], timeout=30)
+                        if response.status_code == 200:
+                            subtitle_json = orjson.loads(response.content)  # straight from bytes
+                            # Extract text from events
+                            events = subtitle_json.get('events', [])
+                            transcript_text = ' '.join(
+                                seg['utf8']
+                                for event in events if 'segs' in event
+                                for seg in event['segs'] if 'utf8' in seg
+                            )
+                            logger.info(f"Extracted transcript: {len(transcript_text)} chars")
+                            break
             
-            except Exception as e:
-                logger.error(f"Error scraping YouTube video {video_url}: {e}")
-                import traceback
-                logger.debug(traceback.format_exc())
-                continue
-        
-        logger.info(f"YouTube scraping complete. Found {len(sources)} videos")
-        return sources
+            # Fallback to description if no transcript
+            if not transcript_text:
+                logger.warning(f"No subtitles found for {video_id}, using description")
+                transcript_text = description
+                subtitle_source = "description only"
+            
+            return {
+                "title": title,
+                "description": description,
+                "duration": duration,
+                "transcript_text": transcript_text,
+                "subtitle_source": subtitle_source,
+            }
     
-    def extract_video_id(self, url: str) -> str:
+    def extract_video_id(self, url: str) -> Optional[str]:
         """Extract video ID from YouTube URL"""
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([a-zA-Z0-9_-]{11})',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
\ No newline at end of file
+        match = _VIDEO_ID_RE.search(url)
+        return match.group(1) if match else None
\ No newline at end of file
@@ -1,6 +1,34 @@
 from config.db_config import engine, Base
 from database.models import Source, Chunk, Narrative, ScrapingLog, PDFExtraction
+from sqlalchemy import text
 from loguru import logger
+import argparse
+
+# Server-side defaults for databases created before the models used them
+DEFAULT_MIGRATIONS = [
+    "ALTER TABLE sources ALTER COLUMN id SET DEFAULT gen_random_uuid()",
+    "ALTER TABLE sources ALTER COLUMN ingested_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE chunks ALTER COLUMN id SET DEFAULT gen_random_uuid()",
+    "ALTER TABLE chunks ALTER COLUMN created_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE narratives ALTER COLUMN id SET DEFAULT gen_random_uuid()",
+    "ALTER TABLE narratives ALTER COLUMN created_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE scraping_logs ALTER COLUMN id SET DEFAULT gen_random_uuid()",
+    "ALTER TABLE scraping_logs ALTER COLUMN scraped_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE pdf_extractions ALTER COLUMN id SET DEFAULT gen_random_uuid()",
+]
+
+# Rebuild indexes on an existing database to match the models
+# (jsonb_path_ops GIN opclass + composite type/date index).
+# CONCURRENTLY avoids locking the tables against writes.
+INDEX_MIGRATIONS = [
+    ("idx_source_geo", "CREATE INDEX CONCURRENTLY idx_source_geo ON sources USING gin (geo jsonb_path_ops)"),
+    ("idx_chunk_tags", "CREATE INDEX CONCURRENTLY idx_chunk_tags ON chunks USING gin (tags jsonb_path_ops)"),
+    ("idx_chunk_entities", "CREATE INDEX CONCURRENTLY idx_chunk_entities ON chunks USING gin (entities jsonb_path_ops)"),
+    ("idx_narrative_issues", "CREATE INDEX CONCURRENTLY idx_narrative_issues ON narratives USING gin (issues jsonb_path_ops)"),
+    ("idx_narrative_geo", "CREATE INDEX CONCURRENTLY idx_narrative_geo ON narratives USING gin (geo jsonb_path_ops)"),
+    ("idx_source_type_pub", "CREATE INDEX CONCURRENTLY idx_source_type_pub ON sources (source_type, published_at DESC)"),
+    ("idx_source_pdf", "CREATE INDEX CONCURRENTLY idx_source_pdf ON sources (id) WHERE lower(source_url) LIKE '%.pdf'"),
+]
 
 
 def create_tables():
@@ -13,7 +41,44 @@ def create_tables():
         raise
 
 
+def migrate_defaults():
+    """Install server-side id/timestamp defaults on existing tables"""
+    try:
+        with engine.begin() as conn:
+            for statement in DEFAULT_MIGRATIONS:
+                conn.execute(text(statement))
+        logger.info("✅ Server-side defaults installed")
+    except Exception as e:
+        logger.error(f"❌ Error installing server-side defaults: {e}")
+        raise
+
+
+def migrate_indexes():
+    """Drop and recreate indexes whose definition changed"""
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, create_sql in INDEX_MIGRATIONS:
+            try:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(create_sql))
+                logger.info(f"✅ Rebuilt index {name}")
+            except Exception as e:
+                logger.error(f"❌ Error rebuilding index {name}: {e}")
+                raise
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Initialize the database")
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Bring an existing database up to date (defaults and indexes)",
+    )
+    args = parser.parse_args()
+
     create_tables()
+    if args.migrate:
+        migrate_defaults()
+        migrate_indexes()
 
 
@@ -1,12 +1,34 @@
 import hashlib
+import os
 import re
+from functools import lru_cache
 from typing import Dict, List
 from datetime import datetime
 from langdetect import detect, LangDetectException
+from loguru import logger
+from config.settings import get_settings
+
+try:
+    import fasttext  # optional, C++ language ID (much faster than langdetect)
+except ImportError:
+    fasttext = None
+
+# Compiled once; these run on every scraped source
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\u0900-\u097F.,!?-]')
+# Same filter as _SPECIAL_CHARS_RE for pure-ASCII text, as a C-level str.translate
+_ASCII_SPECIAL_CHARS = str.maketrans(
+    '', '', ''.join(c for c in map(chr, range(128)) if _SPECIAL_CHARS_RE.match(c))
+)
+# District and ward mentions found in a single scan
+_GEO_RE = re.compile(
+    r'(?P<indore>indore|इंदौर)|ward[:\s]*(?P<w1>\d+)|वार्ड[:\s]*(?P<w2>\d+)',
+    re.IGNORECASE,
+)
 
 def generate_hash(text: str) -> str:
-    """Generate SHA256 hash of text"""
-    return hashlib.sha256(text.encode()).hexdigest()
+    """Generate a 128-bit BLAKE2b hex digest of text (faster than SHA256 in software)"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
 
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
@@ -14,13 +36,36 @@ def clean_text(text: str) -> str:
         return ""
     
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     # Remove special characters but keep Hindi characters
-    text = re.sub(r'[^\w\s\u0900-\u097F.,!?-]', '', text)
+    if text.isascii():
+        text = text.translate(_ASCII_SPECIAL_CHARS)
+    else:
+        text = _SPECIAL_CHARS_RE.sub('', text)
     return text.strip()
 
+@lru_cache(maxsize=1)
+def _get_lid_model():
+    """Load the fastText language-ID model once; None if fasttext or the model file is missing"""
+    path = get_settings().LANGID_MODEL_PATH
+    if fasttext is None or not path or not os.path.exists(path):
+        return None
+    try:
+        return fasttext.load_model(path)
+    except Exception as e:
+        logger.warning(f"Could not load language-ID model {path}: {e}; using langdetect")
+        return None
+
 def detect_language(text: str) -> str:
-    """Detect language of text"""
+    """Detect language of text (fastText when available, langdetect otherwise)"""
+    model = _get_lid_model()
+    if model is not None:
+        # predict() rejects newlines; 1000 chars is plenty and caps latency
+        sample = text[:1000].replace('\n', ' ').strip()
+        if not sample:
+            return "unknown"
+        labels, _ = model.predict(sample, k=1)
+        return labels[0].replace('__label__', '') if labels else "unknown"
     try:
         lang = detect(text)
         return lang
@@ -36,35 +81,44 @@ def extract_geo_from_text(text: str) -> Dict:
         "ward": None
     }
     
-    # Simple pattern matching for Indore
-    if re.search(r'indore|इंदौर', text, re.IGNORECASE):
-        geo["district"] = "Indore"
+    if not text:
+        return geo
     
-    # Extract ward numbers
-    ward_match = re.search(r'ward[:\s]*(\d+)|वार्ड[:\s]*(\d+)', text, re.IGNORECASE)
-    if ward_match:
-        geo["ward"] = f"Ward{ward_match.group(1) or ward_match.group(2)}"
+    # One pass for both the Indore mention and the first ward number;
+    # stops as soon as both are known
+    for match in _GEO_RE.finditer(text):
+        if match.group('indore'):
+            geo["district"] = "Indore"
+        elif geo["ward"] is None:
+            geo["ward"] = f"Ward{match.group('w1') or match.group('w2')}"
+        if geo["district"] and geo["ward"]:
+            break
     
     return geo
 
+# Base trust by source type, and domain suffixes that override it
+_SOURCE_TYPE_TRUST = {
+    "government": 1.0,
+    "policy": 0.95,
+    "media": 0.8,
+    "social": 0.5,
+    "voice": 0.6
+}
+_DOMAIN_TRUST = (
+    ("nic.in", 1.0),
+    ("gov.in", 1.0),
+    ("bhaskar.com", 0.85),
+    ("indianexpress.com", 0.85),
+    ("indiatoday.in", 0.80),
+    ("freepressjournal.in", 0.80),
+)
+
 def calculate_trust_score(source_type: str, domain: str) -> float:
     """Calculate trust score based on source type and domain"""
-    trust_scores = {
-        "government": 1.0,
-        "policy": 0.95,
-        "media": 0.8,
-        "social": 0.5,
-        "voice": 0.6
-    }
-    
-    base_score = trust_scores.get(source_type, 0.5)
-    
-    # Adjust based on domain
-    if "nic.in" in domain or ".gov.in" in domain:
-        return 1.0
-    elif "bhaskar.com" in domain or "indianexpress.com" in domain:
-        return 0.85
-    elif "indiatoday.in" in domain or "freepressjournal.in" in domain:
-        return 0.80
+    # Adjust based on domain (host without port: the domain itself or a subdomain of it)
+    host = (domain or "").lower().rsplit(':', 1)[0]
+    for suffix, score in _DOMAIN_TRUST:
+        if host == suffix or host.endswith('.' + suffix):
+            return score
     
-    return base_score
\ No newline at end of file
+    return _SOURCE_TYPE_TRUST.get(source_type, 0.5)
@@ -2,136 +2,204 @@ from sqlalchemy import create_engine, text
 import pandas as pd
 import json
 from collections import Counter
-from copy import deepcopy
+import numpy as np
+import os
+from itertools import islice
+from multiprocessing import Pool
 from config.db_config import engine
+from database.db_operations import psql_insert_copy
 
 
-# ---------- 2️⃣ Cleaning + Enrichment Function ----------
-def clean_and_enrich(data: dict):
-    """Clean, enrich, and restructure a record from the visualizer table."""
-    cleaned = deepcopy(data)
+# ---------- 2️⃣ Cleaning + Enrichment (column-wise) ----------
+# JSON text columns in 'visualizer' and the empty value each falls back to
+JSON_COLUMNS = {
+    "sentiment": dict,
+    "leadership_polarity": dict,
+    "entities": list,
+    "tags": dict,
+    "geo": dict,
+}
 
-    # Ensure all objects are JSON-safe
-    def make_json_safe(obj):
-        try:
-            json.dumps(obj)
-            return obj
-        except (TypeError, OverflowError):
-            if isinstance(obj, (dict, list)):
-                return json.loads(json.dumps(obj, default=str))
-            return str(obj)
-
-    for k, v in cleaned.items():
-        cleaned[k] = make_json_safe(v)
-
-    # ---------- Helper: safely parse strings to JSON ----------
-    def parse_json_safe(obj):
-        if isinstance(obj, str):
-            try:
-                return json.loads(obj)
-            except json.JSONDecodeError:
-                return {}
-        return obj or {}
-
-    # Extract main fields safely
-    text_content = data.get("text", "") or ""
-    sentiment = parse_json_safe(data.get("sentiment", {}))
-    leadership = parse_json_safe(data.get("leadership_polarity", {}))
-    entities = parse_json_safe(data.get("entities", [])) or []
-    tags = parse_json_safe(data.get("tags", {}))
-    geo = parse_json_safe(data.get("geo", {}))
+EMPTY_VALUES = [None, "", [], {}]
 
-    # ---------- Fix: ensure geo is a dict ----------
-    if not isinstance(geo, dict):
-        geo = {}
-
-    cleaned["metadata_enriched"] = {
-        "text_length": len(text_content),
-        "word_count": len(text_content.split()),
-        "is_government_source": (
-            str(data.get("source_type", "")).lower() == "government"
-        ),
-        "geo_level": (
-            ", ".join([v for v in geo.values() if v]) if isinstance(geo, dict) else None
-        ),
-        "dominant_tone": (
-            "Neutral"
-            if sentiment.get("polarity") == "neutral"
-            else ("Positive" if sentiment.get("score", 0) > 0 else "Negative")
-        ),
-        "entity_count": len(entities),
-        "unique_entity_types": list({e.get("type") for e in entities if e.get("type")}),
-        "issue_count": len(tags.get("issues", [])) if isinstance(tags, dict) else None,
-    }
+CHUNK_ROWS = 5000
+TABLE_NAME = "cleanedv1"
 
-    cleaned["summaries"] = {
-        "entities_summary": {
-            "total_entities": len(entities),
-            "most_common_entity_types": dict(
-                Counter([e.get("type") for e in entities if e.get("type")]).most_common(
-                    5
-                )
-            ),
-            "sample_entities": [
-                e.get("text") or e.get("name") for e in entities[:10] if e
-            ],
-        },
-        "tags_summary": {
-            "frame": tags.get("frame"),
-            "domain": tags.get("domain"),
-            "actors": tags.get("actors"),
-            "issues": tags.get("issues"),
-            "actionability": tags.get("actionability"),
-            "leadership_polarity": tags.get("leadership_polarity"),
-            "confidence": tags.get("confidence"),
-        },
-        "sentiment_summary": {
-            "overall_polarity": sentiment.get("polarity"),
-            "overall_score": sentiment.get("score"),
-            "leadership_score": leadership.get("score"),
-            "leadership_polarity": leadership.get("polarity"),
-        },
-    }
 
-    cleaned["data_quality"] = {
-        "has_text": bool(text_content.strip()),
-        "has_entities": len(entities) > 0,
-        "has_geo": bool(geo),
-        "has_sentiment": bool(sentiment),
-        "has_tags": bool(tags),
-        "missing_fields": [k for k, v in data.items() if v in [None, "", [], {}]],
+def parse_json_safe(obj, default=dict):
+    """Parse a JSON string (or pass through an already-decoded value); falls back to default()."""
+    if isinstance(obj, str):
+        try:
+            return json.loads(obj) or default()
+        except json.JSONDecodeError:
+            return default()
+    return obj or default()
+
+
+def summarize_entities(entities: list):
+    """Single pass over a row's entities: (Counter of entity types, up to 10 sample names)."""
+    type_counts = Counter()
+    sample = []
+    for i, e in enumerate(entities):
+        if not e:
+            continue
+        entity_type = e.get("type")
+        if entity_type:
+            type_counts[entity_type] += 1
+        if i < 10:
+            sample.append(e.get("text") or e.get("name"))
+    return type_counts, sample
+
+
+def clean_and_enrich(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean, enrich, and restructure the visualizer table.
+    Each JSON column is parsed once and scalar fields are computed with Series
+    operations; Python dicts are only built for the nested output columns.
+    """
+    cleaned = df_raw.copy()
+
+    # Missing fields are judged on the raw values, before any parsing
+    columns = list(df_raw.columns)
+    empty_masks = pd.DataFrame(
+        {col: df_raw[col].map(lambda v: v in EMPTY_VALUES) for col in columns}
+    )
+    missing_fields = [
+        [col for col, is_empty in zip(columns, row) if is_empty]
+        for row in empty_masks.itertuples(index=False)
+    ]
+
+    parsed = {
+        col: df_raw[col].map(lambda x, d=default: parse_json_safe(x, d))
+        for col, default in JSON_COLUMNS.items()
     }
-
-    return cleaned
-
-
-# ---------- 3️⃣ Extract All Rows from 'visualizer' ----------
-print("📤 Fetching all rows from 'visualizer' table...")
-with engine.connect() as conn:
-    df_raw = pd.read_sql(text("SELECT * FROM visualizer"), conn)
-
-print(f"✅ Retrieved {len(df_raw)} rows.")
-
-# ---------- 4️⃣ Clean + Enrich Each Row ----------
-cleaned_records = []
-for _, row in df_raw.iterrows():
-    data = row.to_dict()
-    enriched = clean_and_enrich(data)
-    cleaned_records.append(enriched)
-
-# ---------- 5️⃣ Convert to DataFrame ----------
-df_cleaned = pd.DataFrame(cleaned_records)
-
-# Convert complex fields (dict/list) → JSON strings before saving
-for col in df_cleaned.columns:
-    df_cleaned[col] = df_cleaned[col].apply(
-        lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x
+    # ---------- Fix: ensure geo is a dict ----------
+    geo = parsed["geo"].map(lambda g: g if isinstance(g, dict) else {})
+    sentiment = parsed["sentiment"]
+    leadership = parsed["leadership_polarity"]
+    entities = parsed["entities"]
+    tags = parsed["tags"]
+
+    text_content = df_raw["text"].fillna("").astype(str)
+    text_length = text_content.str.len()
+    word_count = text_content.str.split().str.len()
+    has_text = text_content.str.strip().ne("")
+    is_government = df_raw["source_type"].astype(str).str.lower().eq("government")
+
+    sent_polarity = sentiment.map(lambda s: s.get("polarity"))
+    sent_score = sentiment.map(lambda s: s.get("score", 0) or 0)
+    dominant_tone = np.where(
+        sent_polarity == "neutral",
+        "Neutral",
+        np.where(sent_score > 0, "Positive", "Negative"),
     )
+    entity_stats = entities.map(summarize_entities)
+
+    cleaned["metadata_enriched"] = [
+        {
+            "text_length": int(length),
+            "word_count": int(words),
+            "is_government_source": bool(gov),
+            "geo_level": ", ".join([v for v in g.values() if v]),
+            "dominant_tone": tone,
+            "entity_count": len(es),
+            "unique_entity_types": list(type_counts),
+            "issue_count": len(t.get("issues", [])) if isinstance(t, dict) else None,
+        }
+        for length, words, gov, g, tone, es, (type_counts, _), t in zip(
+            text_length, word_count, is_government, geo, dominant_tone,
+            entities, entity_stats, tags,
+        )
+    ]
+
+    cleaned["summaries"] = [
+        {
+            "entities_summary": {
+                "total_entities": len(es),
+                "most_common_entity_types": dict(type_counts.most_common(5)),
+                "sample_entities": sample,
+            },
+            "tags_summary": {
+                "frame": t.get("frame"),
+                "domain": t.get("domain"),
+                "actors": t.get("actors"),
+                "issues": t.get("issues"),
+                "actionability": t.get("actionability"),
+                "leadership_polarity": t.get("leadership_polarity"),
+                "confidence": t.get("confidence"),
+            },
+            "sentiment_summary": {
+                "overall_polarity": s.get("polarity"),
+                "overall_score": s.get("score"),
+                "leadership_score": lp.get("score"),
+                "leadership_polarity": lp.get("polarity"),
+            },
+        }
+        for es, (type_counts, sample), t, s, lp in zip(
+            entities, entity_stats, tags, sentiment, leadership
+        )
+    ]
+
+    cleaned["data_quality"] = [
+        {
+            "has_text": bool(ht),
+            "has_entities": len(es) > 0,
+            "has_geo": bool(g),
+            "has_sentiment": bool(s),
+            "has_tags": bool(t),
+            "missing_fields": missing,
+        }
+        for ht, es, g, s, t, missing in zip(
+            has_text, entities, geo, sentiment, tags, missing_fields
+        )
+    ]
 
-# ---------- 6️⃣ Save as New Table 'cleanedv1' ----------
-table_name = "cleanedv1"
-print(f"💾 Creating table '{table_name}' in PostgreSQL...")
+    return cleaned
 
-df_cleaned.to_sql(name=table_name, con=engine, if_exists="replace", index=False)
 
-print(f"✅ Successfully created '{table_name}' with {len(df_cleaned)} rows.")
+def clean_chunk(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Pool worker: clean + enrich one chunk and serialize it for saving."""
+    # ---------- 4️⃣ Clean + Enrich ----------
+    df_cleaned = clean_and_enrich(df_raw)
+
+    # ---------- 5️⃣ Prepare for Save ----------
+    # Convert complex fields (dict/list) → JSON strings before saving
+    # (only object columns can hold them; numeric/bool columns are skipped)
+    for col in df_cleaned.select_dtypes(include="object").columns:
+        df_cleaned[col] = df_cleaned[col].apply(
+            lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x
+        )
+    return df_cleaned
+
+
+def main():
+    # ---------- 3️⃣ Stream Rows from 'visualizer' ----------
+    # Rows are read CHUNK_ROWS at a time and up to `workers` chunks are cleaned
+    # in parallel, so memory stays bounded at workers * CHUNK_ROWS rows
+    workers = os.cpu_count() or 1
+    total_rows = 0
+
+    print(f"📤 Streaming 'visualizer' into '{TABLE_NAME}' in chunks of {CHUNK_ROWS}...")
+    # Pool is started before any DB connection is opened, so workers don't inherit one
+    with Pool(processes=workers) as pool:
+        # stream_results: server-side cursor, so psycopg2 doesn't buffer the whole result
+        with engine.connect().execution_options(stream_results=True) as conn:
+            reader = pd.read_sql(text("SELECT * FROM visualizer"), conn, chunksize=CHUNK_ROWS)
+            while batch := list(islice(reader, workers)):
+                # ---------- 6️⃣ Save to 'cleanedv1' (first chunk recreates the table) ----------
+                for df_cleaned in pool.imap(clean_chunk, batch):
+                    df_cleaned.to_sql(
+                        name=TABLE_NAME,
+                        con=engine,
+                        if_exists="replace" if total_rows == 0 else "append",
+                        index=False,
+                        method=psql_insert_copy,  # COPY FROM STDIN per chunk
+                    )
+                    total_rows += len(df_cleaned)
+                    print(f"💾 Saved {total_rows} rows so far...")
+
+    print(f"✅ Successfully created '{TABLE_NAME}' with {total_rows} rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,13 @@
-from sqlalchemy import select
+from sqlalchemy import select, table, column
 from config.db_config import engine
-from sqlalchemy import Table, MetaData
 
-metadata = MetaData()
-sources = Table("sources", metadata, autoload_with=engine)
+# Lightweight table clause: only the projected column, no reflection round-trip
+sources = table("sources", column("source_url"))
 
+# ORDER BY is served by the B-tree behind sources.source_url's UNIQUE constraint
 stmt = select(sources.c.source_url).order_by(sources.c.source_url.asc()).limit(153)
 
-with engine.connect() as conn:
-    result = conn.execute(stmt)
-    source_urls = [
-        row[0] for row in result
-    ]  # row[0] because only one column is selected
-
-for url in source_urls:
-    print(url)
+# stream_results: server-side cursor, rows are printed as they arrive
+with engine.connect().execution_options(stream_results=True) as conn:
+    for row in conn.execute(stmt):
+        print(row[0])  # row[0] because only one column is selected
@@ -1,6 +1,7 @@
 from sqlalchemy import text
 import pandas as pd
 import json
+import orjson
 from config.db_config import engine
 
 
@@ -8,16 +9,16 @@ from config.db_config import engine
 def get_row_as_json(row_id: int, engine):
     """
     Extracts a single row from the 'visualizer' table and returns it as a JSON object.
-    row_id: The index (row number) or primary key value if you have one.
+    row_id: The row's primary key (visualizer.id, SERIAL starting at 1).
     """
     query = text(
-        f"""
+        """
         SELECT * FROM visualizer
-        LIMIT 1 OFFSET :offset
+        WHERE id = :id
     """
     )
     with engine.connect() as conn:
-        df = pd.read_sql(query, conn, params={"offset": row_id})
+        df = pd.read_sql(query, conn, params={"id": row_id})
 
     if df.empty:
         print("❌ No row found for the given ID.")
@@ -31,15 +32,15 @@ def get_row_as_json(row_id: int, engine):
     for col in json_cols:
         if col in row_dict and isinstance(row_dict[col], str):
             try:
-                row_dict[col] = json.loads(row_dict[col])
-            except json.JSONDecodeError:
+                row_dict[col] = orjson.loads(row_dict[col])
+            except orjson.JSONDecodeError:
                 pass  # skip if not valid JSON
 
     return row_dict
 
 
 # ---------- 3️⃣ Example Usage ----------
-row_id = 129  # first row (0-based index)
+row_id = 129  # visualizer.id
 row_json = get_row_as_json(row_id, engine)
 
 # ---------- 4️⃣ Output ----------
@@ -1,7 +1,7 @@
 from sqlalchemy import create_engine, text
 import pandas as pd
-import json
 from config.db_config import engine
+from database.db_operations import psql_insert_copy
 
 # ---------- 2️⃣ SQL Join Query ----------
 join_query = text(
@@ -11,13 +11,13 @@ join_query = text(
         s.title,
         s.domain,
         s.source_type,
-        s.geo,
+        s.geo::text AS geo,
         c.source_id,
         c.text,
-        c.entities,
-        c.tags,
-        c.sentiment,
-        c.leadership_polarity
+        c.entities::text AS entities,
+        c.tags::text AS tags,
+        c.sentiment::text AS sentiment,
+        c.leadership_polarity::text AS leadership_polarity
     FROM chunks c
     JOIN sources s ON c.source_id = s.id
 """
@@ -29,16 +29,10 @@ with engine.connect() as conn:
 
 print("✅ Data joined successfully. Number of rows:", len(df_combined))
 
-# ---------- 4️⃣ Convert dict/list columns to JSON strings ----------
-json_cols = ["entities", "tags", "sentiment", "leadership_polarity", "geo"]
+# JSONB columns are cast to text in the query, so they arrive as JSON strings
+# ready to store (no per-row decode in psycopg2 and re-encode here)
 
-for col in json_cols:
-    if col in df_combined.columns:
-        df_combined[col] = df_combined[col].apply(
-            lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x
-        )
-
-# ---------- 5️⃣ Write DataFrame to Database ----------
+# ---------- 4️⃣ Write DataFrame to Database ----------
 table_name = "visualizer"  # or "combined_data"
 
 df_combined.to_sql(
@@ -47,6 +41,12 @@ df_combined.to_sql(
     if_exists="replace",  # replace table if exists
     index=False,
     dtype=None,  # SQLAlchemy will infer datatypes
+    method=psql_insert_copy,  # COPY FROM STDIN per chunk
+    chunksize=5000,
 )
 
+# Stable primary key so single rows can be fetched by index seek (see structure.py)
+with engine.begin() as conn:
+    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN id SERIAL PRIMARY KEY"))
+
 print(f"✅ New table '{table_name}' created successfully in the database.")